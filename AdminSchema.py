@@ -1,18 +1,23 @@
 import strawberry
-from prisma import Prisma
 from typing import Optional
 from fastapi import HTTPException
 import typing
-import bcrypt
 import re
 import datetime
 import jwt
 from datetime import timedelta
-from InstructorSchema import Instructor as InstructorType, InstructorPaginatedResponse
+from database import create_data, db, patch_data
+from fastpath import read_actions
+from prisma.errors import UniqueViolationError
+from passwords import password_hasher
+from pagination import SORT_FIELDS, PageInfo, paginate
+from invalidation import invalidation_bus
+from loaders import get_loader
+from projection import selected_columns
+from ratelimit import check_login_allowed, login_rate_limiter
+from last_login import last_login_writer
 
 
-# Initialize Prisma client
-db = Prisma()
 SECRET_KEY = "your-secret-key-here-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
@@ -48,7 +53,6 @@ class Admin:
     first_name: str
     last_name: str
     email: str
-    password: str
     phone_number: Optional[str]
     profile_image: Optional[str]
     account_status: Optional[str]
@@ -75,6 +79,7 @@ class AdminPaginatedResponse:
     admins: typing.List[Admin]
     total_count: int
     filtered_count: int
+    page_info: typing.Optional[PageInfo] = None
 
 
 @strawberry.input
@@ -82,31 +87,26 @@ class AdminInput:
     first_name: str
     last_name: str
     email: str
-    password: Optional[str] = None
-    phone_number: Optional[str] = None
-    profile_image: Optional[str] = None
-    account_status: Optional[str] = None
-    email_verified: Optional[bool] = None
+    password: Optional[str] = strawberry.UNSET
+    phone_number: Optional[str] = strawberry.UNSET
+    profile_image: Optional[str] = strawberry.UNSET
+    account_status: Optional[str] = strawberry.UNSET
+    email_verified: Optional[bool] = strawberry.UNSET
 
 
 @strawberry.type
 class Query:
     @strawberry.field
-    async def login_admin(self, email: str, password: str) -> AdminLoginResponse:
+    async def login_admin(self, info: strawberry.Info, email: str, password: str) -> AdminLoginResponse:
+        await check_login_allowed(info, "admin", email)
         try:
-            admin = await db.admin.find_unique(where={"email": email})
+            admin = await read_actions("admin", "login", db.admin).find_unique(where={"email": email})
             if not admin:
                 raise HTTPException(status_code=401, detail="Invalid email or password")
-            if not bcrypt.checkpw(password.encode('utf-8'), admin.password.encode('utf-8')):
+            if not await password_hasher.verify(password, admin.password):
                 raise HTTPException(status_code=401, detail="Invalid email or password")
-            # update last_login
-            try:
-                await db.admin.update(
-                    where={"admin_id": admin.admin_id},
-                    data={"last_login": datetime.datetime.now(datetime.timezone.utc).isoformat()}
-                )
-            except Exception:
-                raise HTTPException(status_code=400, detail=f"Error updating last_login:{str(e)}")
+            # Written in the background by last_login_writer
+            last_login_writer.record("admin", admin.admin_id)
             
             # Create JWT token with basic admin information and role
             token_data = {
@@ -117,6 +117,7 @@ class Query:
                 "role": "admin"  # Added role field
             }
             access_token = create_access_token(data=token_data)
+            await login_rate_limiter.succeeded("admin", email)
             
             # Create admin user info object
             admin_user_info = AdminUserInfo(
@@ -137,34 +138,30 @@ class Query:
     @strawberry.field
     async def list_admins_paginated(
         self,
+        info: strawberry.Info,
         page: int = 1,
         per_page: int = 10,
         sort_field: str = "admin_id",
         sort_order: str = "asc",
         search: typing.Optional[str] = None,
+        first: typing.Optional[int] = None,
+        after: typing.Optional[str] = None,
     ) -> AdminPaginatedResponse:
         """
-        Get paginated list of admins with optional search filter on name or email
+        Get paginated list of admins with optional search filter on name or email.
+        Pass first/after instead of page/per_page for cursor pagination.
         """
         if page < 1:
             page = 1
         if per_page < 1:
             per_page = 10
-        skip = (page - 1) * per_page
 
         # Validate sort field
-        allowed_sort_fields = {
-            "admin_id",
-            "first_name",
-            "last_name",
-            "email",
-            "account_status",
-            "created_at",
-            "updated_at",
-        }
-        field = sort_field if sort_field in allowed_sort_fields else "admin_id"
+        field = sort_field if sort_field in SORT_FIELDS["admin"] else "admin_id"
         direction = sort_order.lower() if sort_order.lower() in {"asc", "desc"} else "asc"
-        order: typing.Optional[dict] = {field: direction}
+        # Searches can be ranked by trigram similarity instead
+        if sort_field == "relevance" and search:
+            field = "relevance"
 
         try:
             # Build where clause for search
@@ -178,35 +175,30 @@ class Query:
                     ]
                 }
 
-            # Get total count (without filters)
-            total_count = await db.admin.count()
-
-            # Get filtered count (with search filter)
-            filtered_count = await db.admin.count(where=where_clause if where_clause else None)
-
-            # Get paginated admins
-            admins = await db.admin.find_many(
-                where=where_clause if where_clause else None,
-                skip=skip,
-                take=per_page,
-                order=order,
+            # Fetch only the columns the client selected (plus the cursor's)
+            columns = selected_columns(info, "admins", Admin, always={"admin_id", field} - {"relevance"})
+            admins, total_count, filtered_count, page_info = await paginate(
+                db.admin, "admin", info, where_clause, field, direction, "admin_id", page, per_page, first, after, search, columns
             )
 
             return AdminPaginatedResponse(
                 admins=admins,
                 total_count=total_count,
-                filtered_count=filtered_count
+                filtered_count=filtered_count,
+                page_info=page_info,
             )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
     @strawberry.field
-    async def get_admin(self, admin_id: int) -> Admin:
+    async def get_admin(self, info: strawberry.Info, admin_id: int) -> Admin:
         """
-        Get a single admin by ID
+        Get a single admin by ID (batched per request through the admin DataLoader)
         """
         try:
-            admin = await db.admin.find_unique(where={"admin_id": admin_id})
+            admin = await get_loader(info, "admin").load(admin_id)
             if not admin:
                 raise HTTPException(status_code=404, detail=f"Admin with ID {admin_id} not found")
             return admin
@@ -215,64 +207,6 @@ class Query:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
-    @strawberry.field
-    async def list_instructors(
-        self,
-        page: int = 1,
-        per_page: int = 10,
-        sort_field: str = "instructor_id",
-        sort_order: str = "asc",
-        search: typing.Optional[str] = None,
-    ) -> InstructorPaginatedResponse:
-        if page < 1:
-            page = 1
-        if per_page < 1:
-            per_page = 10
-        skip = (page - 1) * per_page
-
-        allowed_sort_fields = {
-            "instructor_id",
-            "first_name",
-            "last_name",
-            "email",
-            "account_status",
-            "created_at",
-            "updated_at",
-        }
-        field = sort_field if sort_field in allowed_sort_fields else "instructor_id"
-        direction = sort_order.lower() if sort_order.lower() in {"asc", "desc"} else "asc"
-        order: typing.Optional[dict] = {field: direction}
-
-        try:
-            where_clause = {}
-            if search:
-                where_clause = {
-                    "OR": [
-                        {"first_name": {"contains": search, "mode": "insensitive"}},
-                        {"last_name": {"contains": search, "mode": "insensitive"}},
-                        {"email": {"contains": search, "mode": "insensitive"}},
-                    ],
-                }
-
-            total_count = await db.instructor.count()
-            filtered_count = await db.instructor.count(where=where_clause if where_clause else None)
-
-            instructors = await db.instructor.find_many(
-                where=where_clause if where_clause else None,
-                skip=skip,
-                take=per_page,
-                order=order,
-            )
-            return InstructorPaginatedResponse(
-                instructors=instructors,
-                total_count=total_count,
-                filtered_count=filtered_count,
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
-
-
-
 
 @strawberry.type
 class Mutation:
@@ -295,21 +229,18 @@ class Mutation:
                 raise ValueError(f"Email {input.email} is already registered")
             
             # Hash the password
-            hashed = bcrypt.hashpw(input.password.encode('utf-8'), bcrypt.gensalt())
+            hashed = await password_hasher.hash(input.password)
             
             # Create the admin
             admin = await db.admin.create(
                 data={
-                    "first_name": input.first_name,
-                    "last_name": input.last_name,
-                    "email": input.email,
-                    "password": hashed.decode('utf-8'),
+                    **create_data(input, exclude=("password",)),
+                    "password": hashed,
                     "phone_number": input.phone_number if input.phone_number else None,
-                    "profile_image": input.profile_image,
                     "account_status": input.account_status if input.account_status else "active",
-                    "email_verified": input.email_verified if input.email_verified is not None else False,
                 }
             )
+            await invalidation_bus.publish("admin", keys=[admin.admin_id])
             return admin
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
@@ -319,51 +250,30 @@ class Mutation:
     @strawberry.mutation
     async def update_admin(self, admin_id: int, input: AdminInput) -> Admin:
         try:
-            # Check if admin exists
-            existing = await db.admin.find_unique(where={"admin_id": admin_id})
-            if not existing:
-                raise HTTPException(status_code=404, detail=f"Admin with ID {admin_id} not found")
-            
             # Validate email
             validate_email(input.email)
             
-            # Build update data dictionary dynamically
-            update_data = {
-                "first_name": input.first_name,
-                "last_name": input.last_name,
-                "email": input.email,
-            }
-            
-            # Only update phone_number if provided
-            if input.phone_number is not None:
-                update_data["phone_number"] = input.phone_number
-            
-            # Only update profile_image if provided
-            if input.profile_image is not None:
-                update_data["profile_image"] = input.profile_image
-            
-            # Only update account_status if provided
-            if input.account_status is not None:
-                update_data["account_status"] = input.account_status
-            
-            # Only update email_verified if provided
-            if input.email_verified is not None:
-                update_data["email_verified"] = input.email_verified
+            # Only the supplied fields are written, in a single UPDATE
+            update_data = patch_data(input, exclude=("password",))
             
             # Hash and update password only if provided and not empty
             if input.password and input.password.strip():
                 validate_password(input.password)
-                hashed = bcrypt.hashpw(input.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                update_data["password"] = hashed
+                update_data["password"] = await password_hasher.hash(input.password)
             
-            # Perform the update
+            # Perform the update; Prisma returns None when no row matched
             updated = await db.admin.update(
                 where={"admin_id": admin_id},
                 data=update_data
             )
+            if not updated:
+                raise HTTPException(status_code=404, detail=f"Admin with ID {admin_id} not found")
+            await invalidation_bus.publish("admin", keys=[admin_id])
             return updated
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
+        except UniqueViolationError:
+            raise HTTPException(status_code=400, detail=f"Validation error: Email {input.email} is already registered")
         except HTTPException:
             raise
         except Exception as e:
@@ -0,0 +1,146 @@
+import datetime
+import typing
+from typing import Optional
+
+import strawberry
+from fastapi import HTTPException
+from prisma.errors import ForeignKeyViolationError, UniqueViolationError
+
+from auth import get_current_user
+from database import db
+from loaders import get_loader
+from pagination import DEFAULT_PER_PAGE, MAX_PER_PAGE, PageInfo, decode_cursor, encode_cursor
+
+
+ENROLLMENT_STATUSES = {"active", "completed", "dropped"}
+
+
+@strawberry.type
+class Enrollment:
+    enrollment_id: int
+    student_id: int
+    course_id: int
+    status: str
+    progress: int
+    enrolled_at: str
+    completed_at: Optional[str]
+    updated_at: str
+
+    @strawberry.field
+    async def student(self, info: strawberry.Info) -> Optional[typing.Annotated["Student", strawberry.lazy("StudentSchema")]]:
+        return await get_loader(info, "student").load(self.student_id)
+
+    @strawberry.field
+    async def course(self, info: strawberry.Info) -> Optional[typing.Annotated["Course", strawberry.lazy("InstructorSchema")]]:
+        return await get_loader(info, "course").load(self.course_id)
+
+
+@strawberry.type
+class EnrollmentConnection:
+    enrollments: typing.List[Enrollment]
+    page_info: PageInfo
+
+
+async def enrollment_page(
+    info: strawberry.Info,
+    loader: str,
+    parent_id: int,
+    first: int = DEFAULT_PER_PAGE,
+    after: Optional[str] = None,
+    status: Optional[str] = None,
+) -> EnrollmentConnection:
+    """
+    One cursor page of a course roster (``loader="course_enrollments"``) or a
+    student's courses (``"student_enrollments"``), batched across parents
+    """
+    first = min(max(first, 1), MAX_PER_PAGE)
+    after_id = 0
+    if after:
+        try:
+            cursor = decode_cursor(after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
+        if cursor["field"] != "enrollment_id":
+            raise HTTPException(status_code=400, detail="Validation error: Cursor does not belong to an enrollment list")
+        after_id = cursor["pk"]
+
+    rows, has_next_page = await get_loader(info, loader).load((parent_id, status, first, after_id))
+    end_cursor = None
+    if rows:
+        last = rows[-1].enrollment_id
+        end_cursor = encode_cursor("enrollment_id", "asc", last, last)
+    return EnrollmentConnection(enrollments=rows, page_info=PageInfo(has_next_page=has_next_page, end_cursor=end_cursor))
+
+
+def require_enrollment_access(user: Optional[dict], student_id: int):
+    """
+    Students may manage their own enrollments; admins may manage anyone's
+    """
+    if not user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    if user.get("role") == "admin":
+        return
+    if user.get("role") != "student" or str(user.get("sub")) != str(student_id):
+        raise HTTPException(status_code=403, detail="Not allowed to manage this student's enrollments")
+
+
+@strawberry.type
+class Mutation:
+    @strawberry.mutation
+    async def enroll_student(self, info: strawberry.Info, course_id: int, student_id: Optional[int] = None) -> Enrollment:
+        user = get_current_user(info)
+        # A student enrolls themselves unless an admin names someone else
+        if student_id is None and user and user.get("role") == "student":
+            student_id = int(user["sub"])
+        if student_id is None:
+            raise HTTPException(status_code=400, detail="Validation error: student_id is required")
+        require_enrollment_access(user, student_id)
+        try:
+            return await db.enrollment.create(data={"student_id": student_id, "course_id": course_id})
+        except UniqueViolationError:
+            raise HTTPException(status_code=400, detail=f"Validation error: Student {student_id} is already enrolled in course {course_id}")
+        except ForeignKeyViolationError:
+            raise HTTPException(status_code=404, detail="Student or course not found")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+    @strawberry.mutation
+    async def update_enrollment(
+        self,
+        info: strawberry.Info,
+        enrollment_id: int,
+        status: Optional[str] = None,
+        progress: Optional[int] = None,
+    ) -> Enrollment:
+        if status is not None and status not in ENROLLMENT_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Validation error: status must be one of {', '.join(sorted(ENROLLMENT_STATUSES))}")
+        if progress is not None and not 0 <= progress <= 100:
+            raise HTTPException(status_code=400, detail="Validation error: progress must be between 0 and 100")
+
+        try:
+            enrollment = await db.enrollment.find_unique(where={"enrollment_id": enrollment_id})
+            if not enrollment:
+                raise HTTPException(status_code=404, detail=f"Enrollment with ID {enrollment_id} not found")
+            require_enrollment_access(get_current_user(info), enrollment.student_id)
+
+            data = {}
+            if progress is not None:
+                data["progress"] = progress
+                if progress == 100 and status is None:
+                    status = "completed"
+            if status is not None:
+                data["status"] = status
+                if status == "completed" and enrollment.status != "completed":
+                    data["completed_at"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+                elif status != "completed":
+                    data["completed_at"] = None
+            if not data:
+                return enrollment
+            updated = await db.enrollment.update(where={"enrollment_id": enrollment_id}, data=data)
+            if not updated:
+                raise HTTPException(status_code=404, detail=f"Enrollment with ID {enrollment_id} not found")
+            return updated
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
@@ -1,18 +1,29 @@
 import strawberry
-from prisma import Prisma
 from typing import Optional
 from fastapi import HTTPException
 import typing
-import bcrypt
 import re
 import datetime
 import jwt
 from datetime import timedelta
+from types import SimpleNamespace
+from database import create_data, db, patch_data
+from fastpath import read_actions
+from prisma.errors import UniqueViolationError
+from passwords import password_hasher
+from pagination import SORT_FIELDS, PageInfo, paginate, requested_fields
+from cache import course_list_cache, to_json_row
+from catalog import course_catalog
+from invalidation import invalidation_bus
+from loaders import get_loader
+from projection import selected_columns
+from ratelimit import check_login_allowed, login_rate_limiter
+from last_login import last_login_writer
+from auth import get_current_user
+from bulk_import import BulkImportResult, bulk_register, require_admin
+from EnrollmentSchema import EnrollmentConnection, enrollment_page
 
 
-# Initialize Prisma client
-db = Prisma()
-
 # JWT configuration
 SECRET_KEY = "your-secret-key-here-change-in-production"
 ALGORITHM = "HS256"
@@ -20,6 +31,11 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
 email_regex = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
 
+# Course columns list_courses can sort on or search, used to work out which
+# cached catalog pages a course change can affect
+COURSE_SORT_FIELDS = SORT_FIELDS["course"]
+COURSE_SEARCH_FIELDS = {"course_title", "course_status", "course_level", "course_language"}
+
 
 def validate_password(password: str):
 	if len(password) < 8:
@@ -37,6 +53,37 @@ def validate_email(email: str):
 		raise ValueError("Invalid email format")
 
 
+def course_list_tags(field: str, search: Optional[str], courses) -> typing.List[str]:
+	tags = ["all", f"sort:{field}"]
+	if search:
+		tags.append("search")
+	tags.extend(f"course:{course.course_id}" for course in courses)
+	return tags
+
+
+def course_update_tags(course_id: int, changed_fields) -> typing.List[str]:
+	"""
+	Cached catalog pages an update to one course can change: pages that show it,
+	pages ordered by a column whose value changed (updated_at always does) and,
+	when a searchable column changed, every search page.
+	"""
+	tags = [f"course:{course_id}", "sort:updated_at"]
+	tags.extend(f"sort:{field}" for field in changed_fields if field in COURSE_SORT_FIELDS)
+	if COURSE_SEARCH_FIELDS.intersection(changed_fields):
+		tags.append("search")
+	return tags
+
+
+def changed_fields(before, after, written) -> typing.List[str]:
+	"""
+	Written fields whose value differs between the rows before and after an
+	update; every written field when the old row is unknown
+	"""
+	if before is None:
+		return list(written)
+	return [field for field in written if getattr(before, field, None) != getattr(after, field, None)]
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 	to_encode = data.copy()
 	if expires_delta:
@@ -54,7 +101,6 @@ class Instructor:
 	first_name: str
 	last_name: str
 	email: str
-	password: str
 	phone_number: Optional[str]
 	gender: Optional[str]
 	dob: Optional[str]
@@ -95,6 +141,7 @@ class InstructorPaginatedResponse:
 	instructors: typing.List[Instructor]
 	total_count: int
 	filtered_count: int
+	page_info: typing.Optional[PageInfo] = None
 
 
 @strawberry.type
@@ -119,12 +166,24 @@ class Course:
 	created_at: str
 	updated_at: str
 
+	@strawberry.field
+	async def students(
+		self,
+		info: strawberry.Info,
+		first: int = 10,
+		after: typing.Optional[str] = None,
+		status: typing.Optional[str] = None,
+	) -> EnrollmentConnection:
+		# The course roster, batched across every course in the response
+		return await enrollment_page(info, "course_enrollments", self.course_id, first, after, status)
+
 
 @strawberry.type
 class CoursePaginatedResponse:
 	courses: typing.List[Course]
 	total_count: int
 	filtered_count: int
+	page_info: typing.Optional[PageInfo] = None
 
 
 @strawberry.input
@@ -132,61 +191,57 @@ class InstructorInput:
 	first_name: str
 	last_name: str
 	email: str
-	password: str
-	phone_number: Optional[str] = None
-	gender: Optional[str] = None
-	dob: Optional[str] = None
-	bio: Optional[str] = None
-	profile_image: Optional[str] = None
-	city: Optional[str] = None
-	country: Optional[str] = None
-	account_type: Optional[str] = None
-	account_status: Optional[str] = None
-	qualification: Optional[str] = None
-	expertise_area: Optional[str] = None
-	year_of_experience: Optional[int] = None
-	email_verified: Optional[bool] = None
+	# Required to register; leave out on update to keep the current password
+	password: Optional[str] = strawberry.UNSET
+	phone_number: Optional[str] = strawberry.UNSET
+	gender: Optional[str] = strawberry.UNSET
+	dob: Optional[str] = strawberry.UNSET
+	bio: Optional[str] = strawberry.UNSET
+	profile_image: Optional[str] = strawberry.UNSET
+	city: Optional[str] = strawberry.UNSET
+	country: Optional[str] = strawberry.UNSET
+	account_type: Optional[str] = strawberry.UNSET
+	account_status: Optional[str] = strawberry.UNSET
+	qualification: Optional[str] = strawberry.UNSET
+	expertise_area: Optional[str] = strawberry.UNSET
+	year_of_experience: Optional[int] = strawberry.UNSET
+	email_verified: Optional[bool] = strawberry.UNSET
 
 
 @strawberry.input
 class CourseInput:
 	course_title: str
-	course_description: Optional[str] = None
-	course_thumbnail: Optional[str] = None
-	course_level: Optional[str] = None
-	course_language: Optional[str] = None
-	meta_title: Optional[str] = None
-	meta_description: Optional[str] = None
-	meta_keywords: Optional[str] = None
-	estimated_comp_time: Optional[int] = None
-	course_duration: Optional[int] = None
-	total_modules: Optional[int] = None
-	total_lectures: Optional[int] = None
-	total_videos: Optional[int] = None
-	total_resources: Optional[int] = None
-	course_status: Optional[str] = None
-	published_at: Optional[str] = None
+	course_description: Optional[str] = strawberry.UNSET
+	course_thumbnail: Optional[str] = strawberry.UNSET
+	course_level: Optional[str] = strawberry.UNSET
+	course_language: Optional[str] = strawberry.UNSET
+	meta_title: Optional[str] = strawberry.UNSET
+	meta_description: Optional[str] = strawberry.UNSET
+	meta_keywords: Optional[str] = strawberry.UNSET
+	estimated_comp_time: Optional[int] = strawberry.UNSET
+	course_duration: Optional[int] = strawberry.UNSET
+	total_modules: Optional[int] = strawberry.UNSET
+	total_lectures: Optional[int] = strawberry.UNSET
+	total_videos: Optional[int] = strawberry.UNSET
+	total_resources: Optional[int] = strawberry.UNSET
+	course_status: Optional[str] = strawberry.UNSET
+	published_at: Optional[str] = strawberry.UNSET
 
 
 @strawberry.type
 class Query:
 	@strawberry.field
-	async def login_instructor(self, email: str, password: str) -> InstructorLoginResponse:
+	async def login_instructor(self, info: strawberry.Info, email: str, password: str) -> InstructorLoginResponse:
+		await check_login_allowed(info, "instructor", email)
 		try:
-			instructor = await db.instructor.find_unique(where={"email": email})
+			instructor = await read_actions("instructor", "login", db.instructor).find_unique(where={"email": email})
 			if not instructor:
 				raise HTTPException(status_code=401, detail="Invalid email or password")
-			if not bcrypt.checkpw(password.encode("utf-8"), instructor.password.encode("utf-8")):
+			if not await password_hasher.verify(password, instructor.password):
 				raise HTTPException(status_code=401, detail="Invalid email or password")
 
-			# update last_login
-			try:
-				await db.instructor.update(
-					where={"instructor_id": instructor.instructor_id},
-					data={"last_login": datetime.datetime.now(datetime.timezone.utc).isoformat()},
-				)
-			except Exception as e:
-				raise HTTPException(status_code=400, detail=f"Error updating last_login:{str(e)}")
+			# Written in the background by last_login_writer
+			last_login_writer.record("instructor", instructor.instructor_id)
 
 			token_data = {
 				"sub": str(instructor.instructor_id),
@@ -196,6 +251,7 @@ class Query:
 				"role": "instructor",
 			}
 			access_token = create_access_token(data=token_data)
+			await login_rate_limiter.succeeded("instructor", email)
 
 			user_info = InstructorUserInfo(
 				instructor_id=instructor.instructor_id,
@@ -213,9 +269,9 @@ class Query:
 			raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
 	@strawberry.field
-	async def get_instructor(self, instructor_id: int) -> Instructor:
+	async def get_instructor(self, info: strawberry.Info, instructor_id: int) -> Instructor:
 		try:
-			instructor = await db.instructor.find_unique(where={"instructor_id": instructor_id})
+			instructor = await get_loader(info, "instructor").load(instructor_id)
 			if not instructor:
 				raise HTTPException(status_code=404, detail=f"Instructor with ID {instructor_id} not found")
 			return instructor
@@ -227,30 +283,25 @@ class Query:
 	@strawberry.field
 	async def list_instructors(
 		self,
+		info: strawberry.Info,
 		page: int = 1,
 		per_page: int = 10,
 		sort_field: str = "instructor_id",
 		sort_order: str = "asc",
 		search: typing.Optional[str] = None,
+		first: typing.Optional[int] = None,
+		after: typing.Optional[str] = None,
 	) -> InstructorPaginatedResponse:
 		if page < 1:
 			page = 1
 		if per_page < 1:
 			per_page = 10
-		skip = (page - 1) * per_page
-
-		allowed_sort_fields = {
-			"instructor_id",
-			"first_name",
-			"last_name",
-			"email",
-			"account_status",
-			"created_at",
-			"updated_at",
-		}
-		field = sort_field if sort_field in allowed_sort_fields else "instructor_id"
+
+		field = sort_field if sort_field in SORT_FIELDS["instructor"] else "instructor_id"
 		direction = sort_order.lower() if sort_order.lower() in {"asc", "desc"} else "asc"
-		order: typing.Optional[dict] = {field: direction}
+		# Searches can be ranked by trigram similarity instead
+		if sort_field == "relevance" and search:
+			field = "relevance"
 
 		try:
 			where_clause = {}
@@ -263,48 +314,44 @@ class Query:
 					],
 				}
 
-			total_count = await db.instructor.count()
-			filtered_count = await db.instructor.count(where=where_clause if where_clause else None)
-
-			instructors = await db.instructor.find_many(
-				where=where_clause if where_clause else None,
-				skip=skip,
-				take=per_page,
-				order=order,
+			# Fetch only the columns the client selected (plus the cursor's)
+			columns = selected_columns(info, "instructors", Instructor, always={"instructor_id", field} - {"relevance"})
+			instructors, total_count, filtered_count, page_info = await paginate(
+				db.instructor, "instructor", info, where_clause, field, direction, "instructor_id", page, per_page, first, after, search, columns
 			)
 			return InstructorPaginatedResponse(
 				instructors=instructors,
 				total_count=total_count,
 				filtered_count=filtered_count,
+				page_info=page_info,
 			)
+		except ValueError as e:
+			raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
 		except Exception as e:
 			raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
 	@strawberry.field
 	async def list_courses(
 		self,
+		info: strawberry.Info,
 		page: int = 1,
 		per_page: int = 10,
 		sort_field: str = "course_id",
 		sort_order: str = "asc",
 		search: typing.Optional[str] = None,
+		first: typing.Optional[int] = None,
+		after: typing.Optional[str] = None,
 	) -> CoursePaginatedResponse:
 		if page < 1:
 			page = 1
 		if per_page < 1:
 			per_page = 10
-		skip = (page - 1) * per_page
-
-		allowed_sort_fields = {
-			"course_id",
-			"course_title",
-			"course_status",
-			"created_at",
-			"updated_at",
-		}
-		field = sort_field if sort_field in allowed_sort_fields else "course_id"
+
+		field = sort_field if sort_field in COURSE_SORT_FIELDS else "course_id"
 		direction = sort_order.lower() if sort_order.lower() in {"asc", "desc"} else "asc"
-		order: typing.Optional[dict] = {field: direction}
+		# Searches can be ranked by trigram similarity instead
+		if sort_field == "relevance" and search:
+			field = "relevance"
 
 		try:
 			where_clause = {}
@@ -318,103 +365,129 @@ class Query:
 					],
 				}
 
-			total_count = await db.course.count()
-			filtered_count = await db.course.count(where=where_clause if where_clause else None)
+			# The in-memory catalog answers every sort and search but relevance
+			result = None
+			if field != "relevance" and course_catalog.snapshot is not None:
+				result = course_catalog.page(field, direction, page, per_page, first, after, search)
+			if result is not None:
+				courses, total_count, filtered_count, page_info = result
+				return CoursePaginatedResponse(
+					courses=courses,
+					total_count=total_count,
+					filtered_count=filtered_count,
+					page_info=page_info,
+				)
 
-			courses = await db.course.find_many(
-				where=where_clause if where_clause else None,
-				skip=skip,
-				take=per_page,
-				order=order,
+			# Serve repeated catalog pages from the response cache
+			wanted = requested_fields(info)
+			counts = sorted(wanted & {"totalCount", "filteredCount"}) if wanted is not None else None
+			cache_key = course_list_cache.key(page, per_page, field, direction, search, first, after, counts)
+			cached = await course_list_cache.get(cache_key)
+			if cached is not None:
+				return CoursePaginatedResponse(
+					courses=[SimpleNamespace(**course) for course in cached["courses"]],
+					total_count=cached["total_count"],
+					filtered_count=cached["filtered_count"],
+					page_info=PageInfo(**cached["page_info"]),
+				)
+
+			courses, total_count, filtered_count, page_info = await paginate(
+				db.course, "course", info, where_clause, field, direction, "course_id", page, per_page, first, after, search
+			)
+			await course_list_cache.set(
+				cache_key,
+				{
+					"courses": [to_json_row(course) for course in courses],
+					"total_count": total_count,
+					"filtered_count": filtered_count,
+					"page_info": {"has_next_page": page_info.has_next_page, "end_cursor": page_info.end_cursor},
+				},
+				tags=course_list_tags(field, search, courses),
 			)
 			return CoursePaginatedResponse(
 				courses=courses,
 				total_count=total_count,
 				filtered_count=filtered_count,
+				page_info=page_info,
 			)
+		except ValueError as e:
+			raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
 		except Exception as e:
 			raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
 
+async def import_instructors(inputs: list, errors: typing.Optional[list] = None) -> BulkImportResult:
+	"""
+	Bulk-register ``(row, InstructorInput)`` pairs; shared by the mutation and the upload endpoint
+	"""
+	result = await bulk_register(db.instructor, inputs, validate_email, validate_password, errors)
+	if result.created:
+		await invalidation_bus.publish("instructor")
+	return result
+
+
+
 @strawberry.type
 class Mutation:
 	@strawberry.mutation
 	async def register_instructor(self, input: InstructorInput) -> Instructor:
 		try:
 			validate_email(input.email)
+			if not input.password:
+				raise ValueError("Password is required for registration")
 			validate_password(input.password)
 
 			existing = await db.instructor.find_unique(where={"email": input.email})
 			if existing:
 				raise ValueError(f"Email {input.email} is already registered")
 
-			hashed = bcrypt.hashpw(input.password.encode("utf-8"), bcrypt.gensalt())
+			hashed = await password_hasher.hash(input.password)
 			instructor = await db.instructor.create(
 				data={
-					"first_name": input.first_name,
-					"last_name": input.last_name,
-					"email": input.email,
-					"password": hashed.decode("utf-8"),
+					**create_data(input, exclude=("password",)),
+					"password": hashed,
 					"phone_number": input.phone_number if input.phone_number else None,
-					"gender": input.gender,
-					"dob": input.dob,
-					"bio": input.bio,
-					"profile_image": input.profile_image,
-					"city": input.city,
-					"country": input.country,
-					"account_type": input.account_type,
 					"account_status": input.account_status if input.account_status else "active",
-					"qualification": input.qualification,
-					"expertise_area": input.expertise_area,
-					"year_of_experience": input.year_of_experience,
-					"email_verified": input.email_verified if input.email_verified is not None else False,
 				}
 			)
+			await invalidation_bus.publish("instructor", keys=[instructor.instructor_id])
 			return instructor
 		except ValueError as e:
 			raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
 		except Exception as e:
 			raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+	@strawberry.mutation
+	async def bulk_register_instructors(self, info: strawberry.Info, inputs: typing.List[InstructorInput]) -> BulkImportResult:
+		require_admin(get_current_user(info))
+		try:
+			return await import_instructors(list(enumerate(inputs, start=1)))
+		except ValueError as e:
+			raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
+		except Exception as e:
+			raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
 	@strawberry.mutation
 	async def update_instructor(self, instructor_id: int, input: InstructorInput) -> Instructor:
 		try:
 			validate_email(input.email)
+			# Only the supplied fields are written, in a single UPDATE
+			data = patch_data(input, exclude=("password",))
+			# Hash only when a new password is supplied
 			if input.password:
 				validate_password(input.password)
-				hashed = bcrypt.hashpw(input.password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-			else:
-				hashed = None
+				data["password"] = await password_hasher.hash(input.password)
 
-			existing = await db.instructor.find_unique(where={"instructor_id": instructor_id})
-			if not existing:
+			updated = await db.instructor.update(where={"instructor_id": instructor_id}, data=data)
+			# Prisma returns None when no row matched
+			if not updated:
 				raise HTTPException(status_code=404, detail=f"Instructor with ID {instructor_id} not found")
-
-			updated = await db.instructor.update(
-				where={"instructor_id": instructor_id},
-				data={
-					"first_name": input.first_name if input.first_name is not None else existing.first_name,
-					"last_name": input.last_name if input.last_name is not None else existing.last_name,
-					"email": input.email if input.email is not None else existing.email,
-					"phone_number": input.phone_number if input.phone_number is not None else existing.phone_number,
-					"gender": input.gender if input.gender is not None else existing.gender,
-					"dob": input.dob if input.dob is not None else existing.dob,
-					"bio": input.bio if input.bio is not None else existing.bio,
-					"profile_image": input.profile_image if input.profile_image is not None else existing.profile_image,
-					"city": input.city if input.city is not None else existing.city,
-					"country": input.country if input.country is not None else existing.country,
-					"account_type": input.account_type if input.account_type is not None else existing.account_type,
-					"account_status": input.account_status if input.account_status is not None else existing.account_status,
-					"qualification": input.qualification if input.qualification is not None else existing.qualification,
-					"expertise_area": input.expertise_area if input.expertise_area is not None else existing.expertise_area,
-					"year_of_experience": input.year_of_experience if input.year_of_experience is not None else existing.year_of_experience,
-					"email_verified": input.email_verified if input.email_verified is not None else existing.email_verified,
-					"password": hashed if hashed else existing.password,
-				},
-			)
+			await invalidation_bus.publish("instructor", keys=[instructor_id])
 			return updated
 		except ValueError as e:
 			raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
+		except UniqueViolationError:
+			raise HTTPException(status_code=400, detail=f"Validation error: Email {input.email} is already registered")
 		except HTTPException:
 			raise
 		except Exception as e:
@@ -423,39 +496,12 @@ class Mutation:
 	@strawberry.mutation
 	async def create_course(self, input: CourseInput) -> Course:
 		try:
-			data = {"course_title": input.course_title}
-			if input.course_description is not None:
-				data["course_description"] = input.course_description
-			if input.course_thumbnail is not None:
-				data["course_thumbnail"] = input.course_thumbnail
-			if input.course_level is not None:
-				data["course_level"] = input.course_level
-			if input.course_language is not None:
-				data["course_language"] = input.course_language
-			if input.meta_title is not None:
-				data["meta_title"] = input.meta_title
-			if input.meta_description is not None:
-				data["meta_description"] = input.meta_description
-			if input.meta_keywords is not None:
-				data["meta_keywords"] = input.meta_keywords
-			if input.estimated_comp_time is not None:
-				data["estimated_comp_time"] = input.estimated_comp_time
-			if input.course_duration is not None:
-				data["course_duration"] = input.course_duration
-			if input.total_modules is not None:
-				data["total_modules"] = input.total_modules
-			if input.total_lectures is not None:
-				data["total_lectures"] = input.total_lectures
-			if input.total_videos is not None:
-				data["total_videos"] = input.total_videos
-			if input.total_resources is not None:
-				data["total_resources"] = input.total_resources
-			if input.course_status is not None:
-				data["course_status"] = input.course_status
-			if input.published_at is not None:
-				data["published_at"] = input.published_at
+			data = create_data(input)
 
 			course = await db.course.create(data=data)
+			await course_catalog.upsert([course])
+			# A new course can land on any catalog page and changes every count
+			await invalidation_bus.publish("course", keys=[course.course_id], tags=["all"])
 			return course
 		except Exception as e:
 			raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
@@ -463,31 +509,21 @@ class Mutation:
 	@strawberry.mutation
 	async def update_course(self, course_id: int, input: CourseInput) -> Course:
 		try:
-			existing = await db.course.find_unique(where={"course_id": course_id})
-			if not existing:
+			# Only the supplied fields are written, in a single UPDATE
+			data = patch_data(input)
+			# The row as it was, to evict only pages whose sort or search columns
+			# really changed (course_title, for one, is sent on every update). The
+			# catalog has it in memory; otherwise read it when it matters.
+			before = course_catalog.get(course_id)
+			if before is None and (COURSE_SORT_FIELDS | COURSE_SEARCH_FIELDS).intersection(data):
+				before = await db.course.find_unique(where={"course_id": course_id})
+			updated = await db.course.update(where={"course_id": course_id}, data=data)
+			# Prisma returns None when no row matched
+			if not updated:
 				raise HTTPException(status_code=404, detail=f"Course with ID {course_id} not found")
-
-			updated = await db.course.update(
-				where={"course_id": course_id},
-				data={
-					"course_title": input.course_title if input.course_title is not None else existing.course_title,
-					"course_description": input.course_description if input.course_description is not None else existing.course_description,
-					"course_thumbnail": input.course_thumbnail if input.course_thumbnail is not None else existing.course_thumbnail,
-					"course_level": input.course_level if input.course_level is not None else existing.course_level,
-					"course_language": input.course_language if input.course_language is not None else existing.course_language,
-					"meta_title": input.meta_title if input.meta_title is not None else existing.meta_title,
-					"meta_description": input.meta_description if input.meta_description is not None else existing.meta_description,
-					"meta_keywords": input.meta_keywords if input.meta_keywords is not None else existing.meta_keywords,
-					"estimated_comp_time": input.estimated_comp_time if input.estimated_comp_time is not None else existing.estimated_comp_time,
-					"course_duration": input.course_duration if input.course_duration is not None else existing.course_duration,
-					"total_modules": input.total_modules if input.total_modules is not None else existing.total_modules,
-					"total_lectures": input.total_lectures if input.total_lectures is not None else existing.total_lectures,
-					"total_videos": input.total_videos if input.total_videos is not None else existing.total_videos,
-					"total_resources": input.total_resources if input.total_resources is not None else existing.total_resources,
-					"course_status": input.course_status if input.course_status is not None else existing.course_status,
-					"published_at": input.published_at if input.published_at is not None else existing.published_at,
-				},
-			)
+			await course_catalog.upsert([updated])
+			changed = changed_fields(before, updated, data)
+			await invalidation_bus.publish("course", keys=[course_id], tags=course_update_tags(course_id, changed))
 			return updated
 		except HTTPException:
 			raise
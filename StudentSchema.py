@@ -1,23 +1,40 @@
 import  strawberry
-from prisma import Prisma
 from typing import Optional
 from fastapi import HTTPException
 import typing
-import bcrypt
+import logging
 import re
 import datetime
 import jwt
 from datetime import timedelta
+from database import db, patch_data
+from fastpath import read_actions
+from prisma.errors import UniqueViolationError
+from passwords import password_hasher
+from pagination import SORT_FIELDS, PageInfo, paginate
+from invalidation import invalidation_bus
+from loaders import get_loader
+from projection import selected_columns
+from ratelimit import check_login_allowed, login_rate_limiter
+from last_login import last_login_writer
+from auth import get_current_user
+from bulk_import import BulkImportResult, bulk_register, require_admin
+from EnrollmentSchema import EnrollmentConnection, enrollment_page
 
 
-# Initialize Prisma client
-db = Prisma()
 # JWT Configuration
 SECRET_KEY = "your-secret-key-here-change-in-production"  # Change this to a secure secret key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
 email_regex = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
+
+# update_student writes every profile field it is sent, so an explicit null
+# clears these (updates of the other models keep the stored value on null)
+STUDENT_CLEARABLE_FIELDS = ("phone_number", "dob", "gender", "country", "city", "bio", "profile_image", "future_goal")
+
+logger = logging.getLogger(__name__)
+
 def validate_password(password: str):
     if len(password) < 8:
         raise ValueError("Password must be at least 8 characters long")
@@ -58,13 +75,24 @@ class Student:
     bio: Optional[str]
     profile_image: Optional[str]
     future_goal: Optional[str]
-    password: str
     account_status: str
     email_verified: bool
     last_login: Optional[str]
     password_last_change: Optional[str]
     created_at: str
     updated_at: str
+
+    @strawberry.field
+    async def courses(
+        self,
+        info: strawberry.Info,
+        first: int = 10,
+        after: typing.Optional[str] = None,
+        status: typing.Optional[str] = None,
+    ) -> EnrollmentConnection:
+        # The student's enrollments, batched across every student in the response
+        return await enrollment_page(info, "student_enrollments", self.id, first, after, status)
+
 @strawberry.type
 class LoginResponse:
     token: str
@@ -85,14 +113,15 @@ class StudentPaginatedResponse:
     students: typing.List[Student]
     total_count: int
     filtered_count: int
-    
+    page_info: typing.Optional[PageInfo] = None
 
 
 @strawberry.type
 class Query:
     @strawberry.field
-    async def get_student(self, id: strawberry.ID) -> Student:
-        student = await db.student.find_unique(where={"id": int(id)})
+    async def get_student(self, info: strawberry.Info, id: strawberry.ID) -> Student:
+        # Batched with other get_student lookups in the same request
+        student = await get_loader(info, "student").load(int(id))
         
         if student is None:
             raise Exception(f"Student with ID {id} not found")
@@ -102,11 +131,14 @@ class Query:
     @strawberry.field
     async def list_students(
         self,
+        info: strawberry.Info,
         page: int = 1,
         per_page: int = 10,
         sort_field: str = "id",
         sort_order: str = "asc",
         search: typing.Optional[str] = None,
+        first: typing.Optional[int] = None,
+        after: typing.Optional[str] = None,
     ) -> StudentPaginatedResponse:
         
         # Normalize pagination parameters to sensible defaults
@@ -114,23 +146,14 @@ class Query:
             page = 1
         if per_page < 1:
             per_page = 10
-        skip = (page - 1) * per_page
-
-        # Define allowed fields for sorting to prevent arbitrary SQL injection
-        allowed_sort_fields = {
-            "id",
-            "first_name",
-            "last_name",
-            "email",
-            "created_at",
-            "updated_at",
-        }
-        # Fallback to 'id' if the provided field isn't valid
-        field = sort_field if sort_field in allowed_sort_fields else "id"
-        direction = sort_order.lower() if sort_order.lower() in {"asc", "desc"} else "asc"
 
-        # Compose the order argument for Prisma. If no sorting is desired, omit
-        order: typing.Optional[dict] = {field: direction}
+        # Only whitelisted sort fields (to prevent arbitrary SQL injection);
+        # fallback to 'id' if the provided field isn't valid
+        field = sort_field if sort_field in SORT_FIELDS["student"] else "id"
+        direction = sort_order.lower() if sort_order.lower() in {"asc", "desc"} else "asc"
+        # Searches can be ranked by trigram similarity instead
+        if sort_field == "relevance" and search:
+            field = "relevance"
 
         try:
             where_clause = {}
@@ -143,43 +166,37 @@ class Query:
                     ]
                 }
 
-            total_count = await db.student.count()
-            filtered_count = await db.student.count(where=where_clause if where_clause else None)
-
-            students = await db.student.find_many(
-                where=where_clause if where_clause else None,
-                skip=skip,
-                take=per_page,
-                order=order,
+            # Fetch only the columns the client selected (plus the cursor's)
+            columns = selected_columns(info, "students", Student, always={"id", field} - {"relevance"})
+            students, total_count, filtered_count, page_info = await paginate(
+                db.student, "student", info, where_clause, field, direction, "id", page, per_page, first, after, search, columns
             )
             return StudentPaginatedResponse(
                 students=students,
                 total_count=total_count,
                 filtered_count=filtered_count,
+                page_info=page_info,
             )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
         except Exception as e:
             # Bubble up a generic error message; log internal details for debugging
-            print("DB ERROR:", e)
+            logger.exception("list_students failed")
             raise Exception(f"An error occurred: {str(e)}")
 
     @strawberry.field
-    async def login_student(self, email: str, password: str) -> LoginResponse:
+    async def login_student(self, info: strawberry.Info, email: str, password: str) -> LoginResponse:
+        await check_login_allowed(info, "student", email)
         try:
-            student = await db.student.find_unique(where={"email": email})
+            student = await read_actions("student", "login", db.student).find_unique(where={"email": email})
             if not student:
                 raise HTTPException(status_code=401, detail="Invalid email or password")
             # Verify password
-            if not bcrypt.checkpw(password.encode("utf-8"), student.password.encode("utf-8")):
+            if not await password_hasher.verify(password, student.password):
                 raise HTTPException(status_code=401, detail="Invalid email or password")
 
-            # Update last_login timestamp (best-effort, ignore update errors)
-            try:
-                await db.student.update(
-                    where={"id": student.id},
-                    data={"last_login": datetime.datetime.now(datetime.timezone.utc).isoformat()},
-                )
-            except Exception as e:
-                raise HTTPException(status_code=400, detail=f"Error updating last_login:{str(e)}")
+            # Written in the background by last_login_writer
+            last_login_writer.record("student", student.id)
 
             token_data = {
                 "sub": str(student.id),
@@ -189,6 +206,7 @@ class Query:
                 "role": "student",
             }
             access_token = create_access_token(data=token_data)
+            await login_rate_limiter.succeeded("student", email)
 
             user_info = UserInfo(
                 id=student.id,
@@ -200,6 +218,8 @@ class Query:
             )
 
             return LoginResponse(token=access_token, user=user_info)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
@@ -208,15 +228,27 @@ class StudentInput:
     first_name: str
     last_name: str
     email: str
-    password: str
-    phone_number: Optional[str] = None
-    dob: Optional[str] = None
-    gender: Optional[str] = None
-    country: Optional[str] = None   
-    city: Optional[str] = None
-    bio: Optional[str] = None
-    profile_image: Optional[str] = None
-    future_goal: Optional[str] = None
+    # Required to register; leave out on update to keep the current password
+    password: Optional[str] = strawberry.UNSET
+    phone_number: Optional[str] = strawberry.UNSET
+    dob: Optional[str] = strawberry.UNSET
+    gender: Optional[str] = strawberry.UNSET
+    country: Optional[str] = strawberry.UNSET   
+    city: Optional[str] = strawberry.UNSET
+    bio: Optional[str] = strawberry.UNSET
+    profile_image: Optional[str] = strawberry.UNSET
+    future_goal: Optional[str] = strawberry.UNSET
+
+
+
+async def import_students(inputs: list, errors: typing.Optional[list] = None) -> BulkImportResult:
+    """
+    Bulk-register ``(row, StudentInput)`` pairs; shared by the mutation and the upload endpoint
+    """
+    result = await bulk_register(db.student, inputs, validate_email, validate_password, errors)
+    if result.created:
+        await invalidation_bus.publish("student")
+    return result
 
 
 
@@ -226,59 +258,47 @@ class Mutation:
     async def update_student(self, id: int, input: StudentInput) -> Student:
         try:
             validate_email(input.email)
-            # Validate password format (only validate if password is provided)
+            # Only the supplied fields are written, in a single UPDATE
+            data = patch_data(input, exclude=("password",), clearable=STUDENT_CLEARABLE_FIELDS)
+            # Hash only when a new password is supplied
             if input.password:
                 validate_password(input.password)
-                hashed_password = bcrypt.hashpw(input.password.encode('utf-8'), bcrypt.gensalt())
-            else:
-                hashed_password = None
-            # Fetch the existing student to get the current password if not updating
-            existing_student = await db.student.find_unique(where={"id": id})
-            if not existing_student:
-                raise HTTPException(status_code=404, detail=f"Student with ID {id} not found")
+                data["password"] = await password_hasher.hash(input.password)
+            updated_student = await db.student.update(where={"id": id}, data=data)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
-        updated_student = await db.student.update(
-            where={"id": id},
-            data={
-                "first_name": input.first_name if hasattr(input, "first_name") else existing_student.first_name,
-                "last_name": input.last_name if hasattr(input, "last_name") else existing_student.last_name,
-                "email": input.email if hasattr(input, "email") else existing_student.email,
-                "dob": input.dob if hasattr(input, "dob") else existing_student.dob,
-                "phone_number": input.phone_number if hasattr(input, "phone_number") else existing_student.phone_number,
-                "gender": input.gender if hasattr(input, "gender") else existing_student.gender,
-                "country": input.country if hasattr(input, "country") else existing_student.country,
-                "city": input.city if hasattr(input, "city") else existing_student.city,
-                "bio": input.bio if hasattr(input, "bio") else existing_student.bio,
-                "profile_image": input.profile_image if hasattr(input, "profile_image") else existing_student.profile_image,
-                "future_goal": input.future_goal if hasattr(input, "future_goal") else existing_student.future_goal,
-                "password": hashed_password.decode('utf-8') if hashed_password else existing_student.password,
-        }
-                )
+        except UniqueViolationError:
+            raise HTTPException(status_code=400, detail=f"Validation error: Email {input.email} is already registered")
+        # Prisma returns None when no row matched
+        if not updated_student:
+            raise HTTPException(status_code=404, detail=f"Student with ID {id} not found")
+        await invalidation_bus.publish("student", keys=[id])
         return updated_student
         
 
     @strawberry.mutation
     async def register_student(self, input: StudentInput) -> Student:
         try:
+            if not input.password:
+                raise ValueError("Password is required for registration")
             # Validate password (minimum 8 characters as an example)
             validate_password(input.password)
             validate_email(input.email)
 
-            hashed_password = bcrypt.hashpw(input.password.encode('utf-8'), bcrypt.gensalt())
             existing_student = await db.student.find_unique(where={"email": input.email})
             if existing_student:
                 raise ValueError(f"Email {input.email} is already registered")
 
+            hashed_password = await password_hasher.hash(input.password)
             registered_student  = await db.student.create(
                 data={
                     "first_name": input.first_name,
                     "last_name": input.last_name,
                     "email": input.email,
-                    "password": hashed_password.decode('utf-8'),
+                    "password": hashed_password,
                 }
             )
-            print(registered_student)
+            await invalidation_bus.publish("student", keys=[registered_student.id])
             return registered_student
         except ValueError as e:
             # Handle validation errors (like password length or duplicate email)
@@ -286,3 +306,13 @@ class Mutation:
         except Exception as e:
             # Catch any other errors
             raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+
+    @strawberry.mutation
+    async def bulk_register_students(self, info: strawberry.Info, inputs: typing.List[StudentInput]) -> BulkImportResult:
+        require_admin(get_current_user(info))
+        try:
+            return await import_students(list(enumerate(inputs, start=1)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
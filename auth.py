@@ -0,0 +1,154 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import jwt
+import strawberry
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from loaders import create_loaders
+
+
+# Maximum number of verified tokens kept in memory
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Take the client IP from X-Forwarded-For; only enable behind a proxy that sets it
+TRUST_PROXY_HEADERS = os.getenv("TRUST_PROXY_HEADERS", "false").lower() in {"1", "true", "yes"}
+
+security = HTTPBearer()
+
+
+class VerifiedTokenCache:
+    """
+    LRU of recently verified JWTs keyed by the token's SHA-256 digest.
+
+    Entries are dropped once the token's ``exp`` passes, so an expired token
+    is always re-verified (and rejected) by PyJWT.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, claims = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def set(self, token: str, claims: dict):
+        if self.maxsize <= 0:
+            return
+        key = self._key(token)
+        self._entries[key] = (claims.get("exp"), claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+token_cache = VerifiedTokenCache(TOKEN_CACHE_SIZE)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify a bearer token, reusing the result of an earlier verification.
+
+    Raises the usual PyJWT errors for expired or invalid tokens.
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        # Imported here because the schema modules import this one
+        from StudentSchema import SECRET_KEY, ALGORITHM
+
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.set(token, claims)
+    return claims
+
+
+# Token verification dependency for REST routes
+def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    try:
+        return decode_access_token(credentials.credentials)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired"
+        )
+    except jwt.InvalidTokenError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+
+def bearer_token(request: Request) -> Optional[str]:
+    header = request.headers.get("authorization")
+    if not header:
+        return None
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+def client_ip(request: Request) -> Optional[str]:
+    if TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+
+async def get_graphql_context(request: Request) -> dict:
+    """
+    GraphQL context_getter: verifies the bearer token once per request and
+    creates the request's DataLoaders.
+
+    Anonymous requests (and requests with a bad token) get ``user=None`` so
+    public operations such as logins and the course catalog keep working;
+    ``auth_error`` says why a supplied token was rejected.
+    """
+    token = bearer_token(request)
+    user = None
+    auth_error = None
+    if token:
+        try:
+            user = decode_access_token(token)
+        except jwt.ExpiredSignatureError:
+            auth_error = "Token has expired"
+        except jwt.InvalidTokenError:
+            auth_error = "Invalid token"
+    return {
+        "user": user,
+        "auth_error": auth_error,
+        "loaders": create_loaders(),
+        "client_ip": client_ip(request),
+    }
+
+
+def get_current_user(info: strawberry.Info) -> Optional[dict]:
+    """
+    Decoded JWT claims of the caller, or None for anonymous requests.
+
+    A request whose bearer token was rejected gets a 401 saying why
+    (e.g. "Token has expired") instead of being treated as anonymous.
+    """
+    auth_error = info.context.get("auth_error")
+    if auth_error:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=auth_error)
+    return info.context.get("user")
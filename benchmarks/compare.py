@@ -0,0 +1,51 @@
+"""
+Diff two load test reports produced by benchmarks/loadtest.py.
+
+    python benchmarks/compare.py baseline.json candidate.json
+
+Prints per-operation latency and throughput changes; positive percentages mean
+the candidate is slower (latency) or faster (throughput).
+"""
+import argparse
+import json
+from pathlib import Path
+
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+
+
+def change(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def compare(baseline: dict, candidate: dict) -> list:
+    rows = []
+    names = sorted(set(baseline["operations"]) | set(candidate["operations"]))
+    for name in names + ["total"]:
+        old = baseline["total"] if name == "total" else baseline["operations"].get(name)
+        new = candidate["total"] if name == "total" else candidate["operations"].get(name)
+        if not old or not new:
+            continue
+        row = [name]
+        for metric in METRICS:
+            row.append(f"{old[metric]:.1f} -> {new[metric]:.1f} ({change(old[metric], new[metric])})")
+        row.append(f"{old['errors']} -> {new['errors']}")
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    candidate = json.loads(Path(args.candidate).read_text())
+    header = ["operation", *METRICS, "errors"]
+    rows = [header] + compare(baseline, candidate)
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
@@ -0,0 +1,324 @@
+"""
+Drive the /graphql endpoint with a weighted mix of operations and report latency.
+
+Start the API against a seeded benchmark database first (see
+``benchmarks/local_postgres.sh``), then:
+
+    python benchmarks/loadtest.py --url http://localhost:8000/graphql \\
+        --mix default --concurrency 32 --duration 60 --output run.json
+
+The report is JSON with p50/p95/p99 latency, error counts and throughput per
+operation; compare two runs with ``benchmarks/compare.py``.
+
+Every request comes from one client IP, so start the API with the login rate
+limits raised (``LOGIN_IP_BURST`` etc., see ``local_postgres.sh``). Rate-limited
+(429) responses are counted separately, left out of the latency and error
+numbers, and make the run exit with status 1.
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+from seed import BENCH_PASSWORD, bench_email
+
+
+SEARCH_TERMS = ["ali", "khan", "fatima1", "python", "graphql", "advanced", "urdu", "zzqx"]
+STUDENT_SORTS = ["id", "first_name", "last_name", "email", "created_at", "updated_at"]
+COURSE_SORTS = ["course_id", "course_title", "course_status", "created_at", "updated_at"]
+
+STUDENT_FIELDS = "id firstName lastName email accountStatus createdAt"
+COURSE_FIELDS = "courseId courseTitle courseLevel courseLanguage courseStatus totalModules"
+
+
+def login_student(ctx, rng):
+    email = bench_email("student", rng.randint(1, ctx["students"]))
+    return (
+        "query($email: String!, $password: String!) { loginStudent(email: $email, password: $password) { token user { id } } }",
+        {"email": email, "password": BENCH_PASSWORD},
+    )
+
+
+def login_instructor(ctx, rng):
+    email = bench_email("instructor", rng.randint(1, ctx["instructors"]))
+    return (
+        "query($email: String!, $password: String!) { loginInstructor(email: $email, password: $password) { token } }",
+        {"email": email, "password": BENCH_PASSWORD},
+    )
+
+
+def login_admin(ctx, rng):
+    email = bench_email("admin", rng.randint(1, ctx["admins"]))
+    return (
+        "query($email: String!, $password: String!) { loginAdmin(email: $email, password: $password) { token } }",
+        {"email": email, "password": BENCH_PASSWORD},
+    )
+
+
+def list_students(ctx, rng):
+    return (
+        f"query($page: Int!) {{ listStudents(page: $page, perPage: 20) {{ totalCount filteredCount students {{ {STUDENT_FIELDS} }} }} }}",
+        {"page": rng.randint(1, max(1, min(500, ctx["students"] // 20)))},
+    )
+
+
+def search_students(ctx, rng):
+    return (
+        f"query($search: String!) {{ listStudents(search: $search, perPage: 20) {{ filteredCount students {{ {STUDENT_FIELDS} }} }} }}",
+        {"search": rng.choice(SEARCH_TERMS)},
+    )
+
+
+def sort_students(ctx, rng):
+    return (
+        f"query($field: String!, $order: String!) {{ listStudents(sortField: $field, sortOrder: $order, perPage: 20) {{ students {{ {STUDENT_FIELDS} }} }} }}",
+        {"field": rng.choice(STUDENT_SORTS), "order": rng.choice(["asc", "desc"])},
+    )
+
+
+def list_instructors(ctx, rng):
+    return (
+        "query($page: Int!) { listInstructors(page: $page, perPage: 20) { totalCount instructors { instructorId firstName lastName email } } }",
+        {"page": rng.randint(1, max(1, ctx["instructors"] // 20))},
+    )
+
+
+def list_courses(ctx, rng):
+    return (
+        f"query($page: Int!, $field: String!) {{ listCourses(page: $page, perPage: 12, sortField: $field) {{ totalCount courses {{ {COURSE_FIELDS} }} }} }}",
+        {"page": rng.randint(1, max(1, min(50, ctx["courses"] // 12))), "field": rng.choice(COURSE_SORTS)},
+    )
+
+
+def search_courses(ctx, rng):
+    return (
+        f"query($search: String!) {{ listCourses(search: $search, perPage: 12) {{ filteredCount courses {{ {COURSE_FIELDS} }} }} }}",
+        {"search": rng.choice(SEARCH_TERMS)},
+    )
+
+
+def get_student(ctx, rng):
+    return (
+        f"query($id: ID!) {{ getStudent(id: $id) {{ {STUDENT_FIELDS} bio }} }}",
+        {"id": str(rng.randint(1, ctx["students"]))},
+    )
+
+
+def get_instructor(ctx, rng):
+    return (
+        "query($id: Int!) { getInstructor(instructorId: $id) { instructorId firstName lastName email bio } }",
+        {"id": rng.randint(1, ctx["instructors"])},
+    )
+
+
+def register_student(ctx, rng):
+    suffix = uuid.uuid4().hex[:12]
+    return (
+        "mutation($input: StudentInput!) { registerStudent(input: $input) { id email } }",
+        {"input": {"firstName": "Load", "lastName": suffix, "email": f"load-{suffix}@bench.test", "password": BENCH_PASSWORD}},
+    )
+
+
+def update_student(ctx, rng):
+    student_id = rng.randint(1, ctx["students"])
+    return (
+        "mutation($id: Int!, $input: StudentInput!) { updateStudent(id: $id, input: $input) { id } }",
+        {
+            "id": student_id,
+            "input": {
+                "firstName": rng.choice(["Ali", "Sara", "Omar"]),
+                "lastName": "Updated",
+                "email": bench_email("student", student_id),
+            },
+        },
+    )
+
+
+OPERATIONS = {
+    "login_student": login_student,
+    "login_instructor": login_instructor,
+    "login_admin": login_admin,
+    "list_students": list_students,
+    "search_students": search_students,
+    "sort_students": sort_students,
+    "list_instructors": list_instructors,
+    "list_courses": list_courses,
+    "search_courses": search_courses,
+    "get_student": get_student,
+    "get_instructor": get_instructor,
+    "register_student": register_student,
+    "update_student": update_student,
+}
+
+# Relative weights per operation
+MIXES = {
+    "default": {
+        "login_student": 6, "login_instructor": 2, "login_admin": 1,
+        "list_students": 10, "search_students": 8, "sort_students": 5, "list_instructors": 4,
+        "list_courses": 25, "search_courses": 10,
+        "get_student": 14, "get_instructor": 5,
+        "register_student": 5, "update_student": 5,
+    },
+    "read_heavy": {
+        "list_students": 15, "search_students": 10, "sort_students": 10, "list_instructors": 5,
+        "list_courses": 35, "search_courses": 10, "get_student": 10, "get_instructor": 5,
+    },
+    "login_storm": {"login_student": 70, "login_instructor": 10, "list_courses": 20},
+    "write_heavy": {"register_student": 40, "update_student": 40, "list_students": 10, "get_student": 10},
+}
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(timings: list, errors: int, rate_limited: int, elapsed: float) -> dict:
+    values = sorted(timings)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "rate_limited": rate_limited,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "max_ms": round(values[-1], 3) if values else 0.0,
+    }
+
+
+async def worker(client, url, ctx, mix, rng, deadline, record):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        query, variables = OPERATIONS[name](ctx, rng)
+        started = time.perf_counter()
+        try:
+            response = await client.post(url, json={"query": query, "variables": variables})
+            outcome = classify(response)
+        except httpx.HTTPError:
+            outcome = "error"
+        record(name, (time.perf_counter() - started) * 1000, outcome)
+
+
+def classify(response) -> str:
+    """
+    "ok", "error" or "rate_limited"; resolvers report a 429 as a GraphQL error
+    """
+    if response.status_code == 429:
+        return "rate_limited"
+    if response.status_code != 200:
+        return "error"
+    errors = response.json().get("errors")
+    if not errors:
+        return "ok"
+    if any(str(error.get("message", "")).startswith("429:") for error in errors):
+        return "rate_limited"
+    return "error"
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    ctx = {"students": args.students, "instructors": args.instructors, "admins": args.admins, "courses": args.courses}
+    mix = MIXES[args.mix]
+    timings = {name: [] for name in mix}
+    errors = {name: 0 for name in mix}
+    rate_limited = {name: 0 for name in mix}
+    recording = False
+
+    def record(name, elapsed_ms, outcome):
+        if not recording:
+            return
+        # A rejected request says nothing about the operation's latency
+        if outcome == "rate_limited":
+            rate_limited[name] += 1
+            return
+        timings[name].append(elapsed_ms)
+        if outcome == "error":
+            errors[name] += 1
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        if args.warmup:
+            deadline = time.monotonic() + args.warmup
+            await asyncio.gather(*(
+                worker(client, args.url, ctx, mix, random.Random(args.seed + i), deadline, record)
+                for i in range(args.concurrency)
+            ))
+
+        recording = True
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            worker(client, args.url, ctx, mix, random.Random(args.seed + 1000 + i), deadline, record)
+            for i in range(args.concurrency)
+        ))
+        elapsed = time.monotonic() - started
+
+    all_timings = [t for values in timings.values() for t in values]
+    return {
+        "meta": {
+            "url": args.url,
+            "mix": args.mix,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+            "dataset": ctx,
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "operations": {
+            name: summarize(timings[name], errors[name], rate_limited[name], elapsed) for name in sorted(mix)
+        },
+        "total": summarize(all_timings, sum(errors.values()), sum(rate_limited.values()), elapsed),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000/graphql")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent virtual clients")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured warm-up seconds")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for reproducible operation sequences")
+    parser.add_argument("--students", type=int, default=100_000, help="Seeded student count")
+    parser.add_argument("--instructors", type=int, default=2_000, help="Seeded instructor count")
+    parser.add_argument("--admins", type=int, default=50, help="Seeded admin count")
+    parser.add_argument("--courses", type=int, default=5_000, help="Seeded course count")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    report = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(report)
+    print(report)
+    if result["total"]["rate_limited"]:
+        sys.exit(
+            f"{result['total']['rate_limited']} requests were rate limited; restart the API with "
+            "LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE and LOGIN_ACCOUNT_BURST raised"
+        )
@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+import os
+import re
+import typing
+from dataclasses import MISSING, fields
+from typing import Callable, Optional
+
+import strawberry
+from fastapi import HTTPException
+from prisma.errors import DataError, UniqueViolationError
+
+from database import create_data
+from passwords import PASSWORD_HASH_WORKERS, PasswordHasher
+
+
+# Rows validated, duplicate-checked, hashed and inserted together
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "500"))
+# Largest import accepted in one request
+BULK_IMPORT_MAX_ROWS = int(os.getenv("BULK_IMPORT_MAX_ROWS", "10000"))
+BULK_IMPORT_HASH_WORKERS = int(os.getenv("BULK_IMPORT_HASH_WORKERS", str(PASSWORD_HASH_WORKERS)))
+
+# Imports hash on their own pool so a large upload never queues logins
+bulk_password_hasher = PasswordHasher(
+    max_workers=BULK_IMPORT_HASH_WORKERS,
+    max_concurrency=BULK_IMPORT_HASH_WORKERS,
+)
+
+
+@strawberry.type
+class BulkRowError:
+    row: int
+    email: Optional[str]
+    message: str
+
+
+@strawberry.type
+class BulkImportResult:
+    created: int
+    failed: int
+    errors: typing.List[BulkRowError]
+
+
+def require_admin(user: Optional[dict]):
+    if not user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin role required")
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def _insert_chunk(actions, chunk: list, errors: list) -> int:
+    """
+    create_many the chunk; if any row is rejected (a concurrent registration
+    took one of the emails, a value is too long, ...), fall back to
+    row-by-row inserts to find out which.
+    """
+    try:
+        return await actions.create_many(data=[data for _, data in chunk])
+    except DataError:
+        created = 0
+        for row, data in chunk:
+            try:
+                await actions.create(data=data)
+                created += 1
+            except UniqueViolationError:
+                errors.append(BulkRowError(row=row, email=data["email"], message=f"Email {data['email']} is already registered"))
+            except DataError as e:
+                errors.append(BulkRowError(row=row, email=data["email"], message=f"Could not be saved: {e}"))
+        return created
+
+
+async def bulk_register(
+    actions,
+    inputs: list,
+    validate_email: Callable[[str], None],
+    validate_password: Callable[[str], None],
+    errors: Optional[list] = None,
+) -> BulkImportResult:
+    """
+    Register many accounts at once.
+
+    ``inputs`` is a list of ``(row number, input)`` pairs. Each chunk is
+    validated in memory, checked for existing emails with a single
+    ``find_many(email in ...)``, hashed in parallel and written with
+    ``create_many``. Bad rows are reported in ``errors`` and never block the
+    rest of the import.
+    """
+    errors = list(errors or [])
+    if len(inputs) > BULK_IMPORT_MAX_ROWS:
+        raise ValueError(f"At most {BULK_IMPORT_MAX_ROWS} rows can be imported at once")
+
+    created = 0
+    seen = set()
+    for chunk in _chunks(inputs, BULK_IMPORT_CHUNK_SIZE):
+        valid = []
+        for row, input in chunk:
+            try:
+                validate_email(input.email)
+                if not input.password:
+                    raise ValueError("Password is required for registration")
+                validate_password(input.password)
+                if input.email in seen:
+                    raise ValueError(f"Email {input.email} appears more than once in this import")
+            except ValueError as e:
+                errors.append(BulkRowError(row=row, email=input.email, message=str(e)))
+                continue
+            seen.add(input.email)
+            valid.append((row, input))
+        if not valid:
+            continue
+
+        existing = await actions.find_many(where={"email": {"in": [input.email for _, input in valid]}})
+        taken = {record.email for record in existing}
+        pending = []
+        for row, input in valid:
+            if input.email in taken:
+                errors.append(BulkRowError(row=row, email=input.email, message=f"Email {input.email} is already registered"))
+            else:
+                pending.append((row, input))
+        if not pending:
+            continue
+
+        hashes = await bulk_password_hasher.hash_many([input.password for _, input in pending])
+        created += await _insert_chunk(
+            actions,
+            [
+                (row, {**create_data(input, exclude=("password",)), "password": hashed})
+                for (row, input), hashed in zip(pending, hashes)
+            ],
+            errors,
+        )
+
+    errors.sort(key=lambda error: error.row)
+    return BulkImportResult(created=created, failed=len(errors), errors=errors)
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _coerce(value, annotation):
+    if value is None or value == "":
+        return None
+    if not isinstance(value, str):
+        return value
+    types = typing.get_args(annotation) or (annotation,)
+    if int in types:
+        return int(value)
+    if bool in types:
+        if value.lower() not in {"true", "false", "1", "0"}:
+            raise ValueError(f"'{value}' is not a boolean")
+        return value.lower() in {"true", "1"}
+    return value
+
+
+def build_input(input_cls, record: dict):
+    """
+    Turn one CSV/NDJSON record (snake_case or camelCase keys) into ``input_cls``
+    """
+    hints = typing.get_type_hints(input_cls)
+    known = {field.name: field for field in fields(input_cls)}
+    values = {}
+    for key, value in record.items():
+        name = _snake_case(key.strip())
+        if name not in known:
+            raise ValueError(f"Unknown column '{key}'")
+        try:
+            values[name] = _coerce(value, hints[name])
+        except ValueError:
+            raise ValueError(f"Invalid value for '{key}': {value!r}")
+    missing = [
+        name for name, field in known.items()
+        if field.default is MISSING and field.default_factory is MISSING and values.get(name) is None
+    ]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return input_cls(**values)
+
+
+def parse_records(body: bytes, format: str) -> typing.Iterator[typing.Tuple[int, dict]]:
+    """
+    Yield ``(row number, record)`` from a CSV (header row first) or NDJSON body.
+    A record that cannot be parsed is yielded as a ValueError instead.
+    """
+    text = body.decode("utf-8-sig")
+    if format == "csv":
+        for row, record in enumerate(csv.DictReader(io.StringIO(text)), start=1):
+            if None in record:
+                yield row, ValueError("Row has more values than the header")
+            else:
+                yield row, record
+        return
+    for row, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+        if not isinstance(record, dict):
+            yield row, ValueError("Each line must be a JSON object")
+        else:
+            yield row, record
+
+
+def detect_format(content_type: Optional[str], format: Optional[str]) -> str:
+    if format:
+        format = format.lower()
+    elif content_type and "csv" in content_type:
+        format = "csv"
+    elif content_type and ("ndjson" in content_type or "jsonl" in content_type or "json" in content_type):
+        format = "ndjson"
+    if format not in {"csv", "ndjson"}:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson",
+        )
+    return format
+
+
+def inputs_from_upload(input_cls, body: bytes, format: str) -> typing.Tuple[list, list]:
+    """
+    Parse an uploaded file into ``(row, input)`` pairs plus row errors for
+    records that could not be turned into ``input_cls``
+    """
+    inputs, errors = [], []
+    for row, record in parse_records(body, format):
+        if isinstance(record, ValueError):
+            errors.append(BulkRowError(row=row, email=None, message=str(record)))
+            continue
+        try:
+            inputs.append((row, build_input(input_cls, record)))
+        except (ValueError, TypeError) as e:
+            email = record.get("email")
+            errors.append(BulkRowError(row=row, email=email if isinstance(email, str) else None, message=str(e)))
+        if len(inputs) + len(errors) > BULK_IMPORT_MAX_ROWS:
+            raise ValueError(f"At most {BULK_IMPORT_MAX_ROWS} rows can be imported at once")
+    return inputs, errors
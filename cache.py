@@ -0,0 +1,249 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, Optional
+
+
+# Seconds an unfiltered table count stays cached
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "30"))
+
+# Response cache for public list queries (currently list_courses)
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")  # "memory" or "redis"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Small in-process cache whose entries expire after ``ttl`` seconds
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: dict = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(key, None)
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class CountCache(TTLCache):
+    """
+    Caches unfiltered ``count()`` results per model
+    """
+
+    async def count(self, actions, model: str) -> int:
+        total = self.get(model)
+        if total is None:
+            total = await actions.count()
+            self.set(model, total)
+        return total
+
+
+# Shared by the list resolvers; mutations clear it (in every worker) through
+# invalidation.invalidation_bus
+count_cache = CountCache(ttl=COUNT_CACHE_TTL)
+
+
+class InMemoryCacheBackend:
+    """
+    Process-local LRU with per-entry TTL and tag index
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._tags: dict = {}
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()):
+        self._drop(key)
+        tags = tuple(tags)
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+
+    async def delete(self, keys: Iterable[str]) -> int:
+        removed = 0
+        for key in list(keys):
+            if key in self._entries:
+                self._drop(key)
+                removed += 1
+        return removed
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        keys = set()
+        for tag in tags:
+            keys |= self._tags.get(tag, set())
+        return await self.delete(keys)
+
+    async def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+
+class RedisCacheBackend:
+    """
+    Shared backend for any client with the redis-py asyncio interface
+    (get/set/delete/sadd/smembers/expire), e.g. ``redis.asyncio.Redis`` or a
+    local fake in tests. Values are stored as JSON; tags are Redis sets.
+    """
+
+    def __init__(self, client, prefix: str = "cache"):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self._key(key))
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()):
+        full_key = self._key(key)
+        await self.client.set(full_key, json.dumps(value), px=max(1, int(ttl * 1000)))
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            await self.client.sadd(tag_key, full_key)
+            # Tag sets outlive their newest entry by one TTL at most
+            await self.client.expire(tag_key, max(1, int(ttl)) + 1)
+
+    async def delete(self, keys: Iterable[str]) -> int:
+        full_keys = [self._key(key) for key in keys]
+        if not full_keys:
+            return 0
+        return await self.client.delete(*full_keys)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        full_keys = set()
+        for tag_key in tag_keys:
+            members = await self.client.smembers(tag_key)
+            full_keys |= {member.decode("utf-8") if isinstance(member, bytes) else member for member in members}
+        removed = await self.client.delete(*full_keys) if full_keys else 0
+        if tag_keys:
+            await self.client.delete(*tag_keys)
+        return removed
+
+    async def clear(self):
+        # SCAN keeps this safe on a shared server
+        async for key in self.client.scan_iter(match=f"{self.prefix}:*"):
+            await self.client.delete(key)
+
+
+class ResponseCache:
+    """
+    Caches JSON-safe resolver payloads keyed on their arguments.
+
+    Entries carry tags (e.g. ``course:12`` or ``sort:course_title``) so a
+    mutation can evict exactly the entries it may have changed.
+    """
+
+    def __init__(self, backend, namespace: str, ttl: float):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def key(self, *parts) -> str:
+        digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    # A cache outage degrades to uncached reads instead of failing requests
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            return await self.backend.get(key)
+        except Exception:
+            logger.exception("Response cache read failed for %s", key)
+            return None
+
+    async def set(self, key: str, value: Any, tags: Iterable[str] = ()):
+        try:
+            await self.backend.set(key, value, self.ttl, [f"{self.namespace}:{tag}" for tag in tags])
+        except Exception:
+            logger.exception("Response cache write failed for %s", key)
+
+    async def invalidate(self, tags: Iterable[str]) -> int:
+        try:
+            return await self.backend.invalidate_tags([f"{self.namespace}:{tag}" for tag in tags])
+        except Exception:
+            logger.exception("Response cache invalidation failed for %s", tags)
+            return 0
+
+    async def clear(self):
+        await self.backend.clear()
+
+
+def create_cache_backend(prefix: str = "cache"):
+    if RESPONSE_CACHE_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package")
+        return RedisCacheBackend(redis.Redis.from_url(REDIS_URL), prefix=prefix)
+    return InMemoryCacheBackend(maxsize=RESPONSE_CACHE_SIZE)
+
+
+def to_json_row(row) -> dict:
+    """
+    JSON-safe dict of a Prisma model. Datetimes become ``str(value)``, the
+    form the GraphQL ``str`` fields return for an uncached row, so cache hits
+    and misses serialize the same.
+    """
+    fields = row.model_dump() if hasattr(row, "model_dump") else vars(row)
+    return {key: str(value) if isinstance(value, (datetime.date, datetime.time)) else value for key, value in fields.items()}
+
+
+# Public course catalog pages
+course_list_cache = ResponseCache(create_cache_backend(), namespace="courses", ttl=RESPONSE_CACHE_TTL)
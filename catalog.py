@@ -0,0 +1,294 @@
+import asyncio
+import bisect
+import datetime
+import logging
+import os
+import time
+import typing
+from typing import Optional
+
+from database import db
+from pagination import MAX_PER_PAGE, SORT_FIELDS, PageInfo, cursor_for, decode_cursor
+from search import SEARCH_TABLES
+
+
+# Serve list_courses from an in-process snapshot of Course_Table
+CATALOG_SNAPSHOT = os.getenv("CATALOG_SNAPSHOT", "true").lower() in {"1", "true", "yes"}
+# Seconds between polls for courses changed by other processes
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", "5"))
+# Seconds between full reloads, which also drop courses deleted outside the API
+CATALOG_FULL_RELOAD_SECONDS = float(os.getenv("CATALOG_FULL_RELOAD_SECONDS", "300"))
+
+# Polls look this far behind the newest updated_at seen, so a transaction
+# that commits late with an earlier timestamp is still picked up
+POLL_OVERLAP = datetime.timedelta(seconds=5)
+
+SEARCH_SEPARATOR = "\x00"
+
+logger = logging.getLogger(__name__)
+
+
+def sort_rank_query(model: str) -> str:
+    """
+    Position of every row in each sort order. Postgres ranks the rows so the
+    snapshot sorts text with the database collation and NULLs where
+    ORDER BY puts them.
+    """
+    table, pk, _ = SEARCH_TABLES[model]
+    ranks = ", ".join(
+        f'row_number() OVER (ORDER BY "{field}", "{pk}") AS "{field}"'
+        for field in sorted(SORT_FIELDS[model])
+        if field != pk
+    )
+    return f'SELECT "{pk}" AS pk, {ranks} FROM "{table}"'
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of every course: the rows in primary key order, each
+    sort column's ascending order (descending is its reverse, as in
+    Postgres with the primary key tie-break) and a lowercase search text
+    per row. Refreshes build a new snapshot.
+    """
+
+    def __init__(
+        self,
+        rows: typing.Iterable,
+        ranks: typing.Dict[int, dict],
+        pk_field: str,
+        sort_fields: typing.Iterable[str],
+        search_fields: typing.Sequence[str],
+    ):
+        self.pk_field = pk_field
+        # Rows the rank query no longer saw were deleted in between
+        self.rows = sorted((row for row in rows if getattr(row, pk_field) in ranks), key=lambda row: getattr(row, pk_field))
+        self.ranks = ranks
+        self.position_of = {getattr(row, pk_field): position for position, row in enumerate(self.rows)}
+        # field -> (row positions in ascending order, their sort keys)
+        self.orders: typing.Dict[str, typing.Tuple[typing.List[int], typing.List[int]]] = {}
+        for field in sort_fields:
+            keys = [self.key(row, field) for row in self.rows]
+            positions = sorted(range(len(self.rows)), key=keys.__getitem__)
+            self.orders[field] = (positions, [keys[position] for position in positions])
+        # Separated so a term never matches across two columns, like the ILIKE filter
+        self.search_text = [
+            SEARCH_SEPARATOR.join((getattr(row, column) or "").lower() for column in search_fields)
+            for row in self.rows
+        ]
+
+    def key(self, row, field: str) -> int:
+        pk = getattr(row, self.pk_field)
+        return pk if field == self.pk_field else self.ranks[pk][field]
+
+    def cursor_key(self, field: str, cursor: dict) -> Optional[int]:
+        """
+        Sort key to resume after, or None when the cursor's row has since
+        moved or gone and only the database can place the cursor
+        """
+        if field == self.pk_field:
+            return cursor["pk"]
+        position = self.position_of.get(cursor["pk"])
+        if position is None or getattr(self.rows[position], field) != cursor["value"]:
+            return None
+        return self.key(self.rows[position], field)
+
+    def positions(self, field: str, direction: str, after_key: Optional[int] = None) -> typing.Iterator[int]:
+        """
+        Row positions in ``field`` order, starting after ``after_key`` when given
+        """
+        positions, keys = self.orders[field]
+        if direction == "asc":
+            start = bisect.bisect_right(keys, after_key) if after_key is not None else 0
+            return iter(positions[start:])
+        end = bisect.bisect_left(keys, after_key) if after_key is not None else len(positions)
+        return reversed(positions[:end])
+
+    def matches(self, position: int, term: Optional[str]) -> bool:
+        return not term or term in self.search_text[position]
+
+
+class CourseCatalog:
+    """
+    In-memory read model behind list_courses.
+
+    ``load`` reads the whole table; a background task then polls for rows
+    whose updated_at moved and periodically reloads everything. Course
+    mutations in this process pass their rows to ``upsert`` so the change
+    shows at once. Until the first load succeeds, ``snapshot`` is None and
+    list_courses reads the database.
+    """
+
+    def __init__(self, model: str, poll_interval: float, full_reload_interval: float):
+        self.model = model
+        _, self.pk_field, self.search_fields = SEARCH_TABLES[model]
+        self.sort_fields = SORT_FIELDS[model]
+        self.poll_interval = poll_interval
+        self.full_reload_interval = full_reload_interval
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._last_seen: Optional[datetime.datetime] = None
+        self._loaded_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        # Serializes rebuilds so a poll never overwrites a newer upsert
+        self._lock = asyncio.Lock()
+
+    def get(self, pk):
+        """
+        The snapshot's row for ``pk``, or None when it is not loaded or has no such row
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            return None
+        position = snapshot.position_of.get(pk)
+        return snapshot.rows[position] if position is not None else None
+
+    @property
+    def actions(self):
+        return getattr(db, self.model)
+
+    async def _build(self, rows: typing.Iterable):
+        ranks = {row["pk"]: row for row in await db.query_raw(sort_rank_query(self.model))}
+        self.snapshot = CatalogSnapshot(rows, ranks, self.pk_field, self.sort_fields, self.search_fields)
+        for row in self.snapshot.rows:
+            if self._last_seen is None or row.updated_at > self._last_seen:
+                self._last_seen = row.updated_at
+
+    async def load(self):
+        async with self._lock:
+            rows = await self.actions.find_many()
+            self._last_seen = None
+            await self._build(rows)
+            self._loaded_at = time.monotonic()
+
+    async def _merge(self, rows: typing.Iterable):
+        changed = {getattr(row, self.pk_field): row for row in rows}
+        if not changed:
+            return
+        kept = [row for row in self.snapshot.rows if getattr(row, self.pk_field) not in changed]
+        await self._build(kept + list(changed.values()))
+
+    async def upsert(self, rows: typing.Iterable):
+        """
+        Replace (or add) ``rows`` by primary key. Failures are only logged:
+        the write already happened and the next poll catches up.
+        """
+        if self.snapshot is None:
+            return
+        try:
+            async with self._lock:
+                await self._merge(rows)
+        except Exception:
+            logger.exception("Updating the %s catalog failed", self.model)
+
+    async def reload(self, keys: typing.Iterable):
+        """
+        Re-read the rows with primary keys ``keys`` (every changed row when
+        empty), dropping the ones that no longer exist
+        """
+        keys = set(keys)
+        if self.snapshot is None:
+            return
+        if not keys:
+            await self.refresh()
+            return
+        async with self._lock:
+            rows = await self.actions.find_many(where={self.pk_field: {"in": sorted(keys)}})
+            kept = [row for row in self.snapshot.rows if getattr(row, self.pk_field) not in keys]
+            await self._build(kept + rows)
+
+    @staticmethod
+    def _fields(row) -> Optional[dict]:
+        if row is None:
+            return None
+        return row.model_dump() if hasattr(row, "model_dump") else vars(row)
+
+    async def refresh(self):
+        if self.snapshot is None or time.monotonic() - self._loaded_at >= self.full_reload_interval:
+            await self.load()
+            return
+        async with self._lock:
+            where = {"updated_at": {"gte": self._last_seen - POLL_OVERLAP}} if self._last_seen else None
+            rows = await self.actions.find_many(where=where)
+            # The overlap returns recent rows again; rebuild only for real changes
+            current = {getattr(row, self.pk_field): row for row in self.snapshot.rows}
+            await self._merge(row for row in rows if self._fields(current.get(getattr(row, self.pk_field))) != self._fields(row))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Refreshing the %s catalog failed", self.model)
+
+    def page(
+        self,
+        field: str,
+        direction: str,
+        page: int,
+        per_page: int,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+        search: Optional[str] = None,
+    ):
+        """
+        The same (rows, total_count, filtered_count, page_info) as
+        ``pagination.paginate`` for a list_courses call, from the snapshot.
+        Returns None when the snapshot cannot place ``after``.
+        """
+        snapshot = self.snapshot
+        per_page = min(per_page, MAX_PER_PAGE)
+        term = search.lower() if search else None
+
+        after_key = None
+        if first is not None or after is not None:
+            take = min(first, MAX_PER_PAGE) if first and first > 0 else per_page
+            skip = 0
+            if after:
+                cursor = decode_cursor(after)
+                if cursor["field"] != field or cursor["direction"] != direction:
+                    raise ValueError("Cursor does not match the requested sort_field/sort_order")
+                after_key = snapshot.cursor_key(field, cursor)
+                if after_key is None:
+                    return None
+        else:
+            take = per_page
+            skip = (page - 1) * per_page
+
+        rows = []
+        matched = 0
+        for position in snapshot.positions(field, direction, after_key):
+            if not snapshot.matches(position, term):
+                continue
+            if skip <= matched <= skip + take:
+                rows.append(snapshot.rows[position])
+            matched += 1
+            if matched > skip + take and not term:
+                break
+
+        has_next_page = len(rows) > take
+        rows = rows[:take]
+        end_cursor = cursor_for(rows[-1], field, direction, self.pk_field) if rows else None
+        total_count = len(snapshot.rows)
+        if not term:
+            filtered_count = total_count
+        elif after_key is None:
+            filtered_count = matched
+        else:
+            filtered_count = sum(1 for position in range(total_count) if snapshot.matches(position, term))
+        return rows, total_count, filtered_count, PageInfo(has_next_page=has_next_page, end_cursor=end_cursor)
+
+
+course_catalog = CourseCatalog("course", CATALOG_POLL_SECONDS, CATALOG_FULL_RELOAD_SECONDS)
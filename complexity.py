@@ -0,0 +1,181 @@
+import os
+import typing
+from typing import Optional
+
+from graphql import (
+    ExecutionResult,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    value_from_ast_untyped,
+)
+from strawberry.extensions import SchemaExtension
+
+from pagination import DEFAULT_PER_PAGE, MAX_PER_PAGE
+
+
+# Largest cost a single document may have; anything above is rejected unexecuted
+GRAPHQL_MAX_COST = int(os.getenv("GRAPHQL_MAX_COST", "2000"))
+GRAPHQL_MAX_DEPTH = int(os.getenv("GRAPHQL_MAX_DEPTH", "8"))
+
+# Fields with a selection set cost OBJECT_COST each, scalars are free
+OBJECT_COST = 1
+# Extra cost of root fields that do more than one cheap query
+FIELD_COSTS = {
+    # bcrypt
+    "loginStudent": 10,
+    "loginInstructor": 10,
+    "loginAdmin": 10,
+    "registerStudent": 10,
+    "registerInstructor": 10,
+    "registerAdmin": 10,
+    "updateStudent": 5,
+    "updateInstructor": 5,
+    "updateAdmin": 5,
+    "enrollStudent": 2,
+    "updateEnrollment": 2,
+    # count() queries
+    "totalCount": 2,
+    "filteredCount": 2,
+}
+# Paginated list fields and the child whose cost repeats once per row
+PAGINATED_FIELDS = {
+    "listStudents": "students",
+    "listInstructors": "instructors",
+    "listAdminsPaginated": "admins",
+    "listCourses": "courses",
+    # Course roster / a student's courses, nested under the lists above
+    "students": "enrollments",
+    "courses": "enrollments",
+}
+# List arguments whose length multiplies the field cost
+LIST_ARGUMENTS = {
+    "bulkRegisterStudents": "inputs",
+    "bulkRegisterInstructors": "inputs",
+}
+
+
+def page_size(arguments: dict) -> int:
+    """
+    Rows a paginated field returns, after the per_page clamp in ``paginate``.
+    A size that cannot be resolved (e.g. an unset variable) is charged as
+    a full page.
+    """
+    for name in ("first", "perPage"):
+        size = arguments.get(name)
+        if size is None:
+            continue
+        if not isinstance(size, int) or isinstance(size, bool):
+            return MAX_PER_PAGE
+        # paginate ignores first < 1 and replaces per_page < 1 with the default
+        if size >= 1:
+            return min(size, MAX_PER_PAGE)
+    return DEFAULT_PER_PAGE
+
+
+class QueryCost:
+    """
+    Static cost of one operation, computed from the document and its variables
+    """
+
+    def __init__(self, fragments: dict, variables: Optional[dict]):
+        self.fragments = fragments
+        self.variables = variables or {}
+
+    def arguments(self, node: FieldNode) -> dict:
+        return {
+            argument.name.value: value_from_ast_untyped(argument.value, self.variables)
+            for argument in node.arguments or ()
+        }
+
+    def fields(self, selection_set: Optional[SelectionSetNode], visited: typing.FrozenSet[str] = frozenset()):
+        """Field nodes of a selection set with fragments expanded"""
+        if selection_set is None:
+            return
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield selection
+            elif isinstance(selection, InlineFragmentNode):
+                yield from self.fields(selection.selection_set, visited)
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                if name in visited or name not in self.fragments:
+                    continue
+                yield from self.fields(self.fragments[name].selection_set, visited | {name})
+
+    def selection_cost(self, selection_set: Optional[SelectionSetNode], rows: int = 1) -> int:
+        return sum(self.field_cost(node, rows) for node in self.fields(selection_set))
+
+    def field_cost(self, node: FieldNode, rows: int = 1) -> int:
+        name = node.name.value
+        arguments = self.arguments(node)
+        cost = FIELD_COSTS.get(name, 0)
+        if node.selection_set is not None:
+            cost += OBJECT_COST
+        if name in LIST_ARGUMENTS:
+            items = arguments.get(LIST_ARGUMENTS[name])
+            cost *= max(1, len(items) if isinstance(items, list) else 1)
+
+        if name in PAGINATED_FIELDS:
+            size = page_size(arguments)
+            child = PAGINATED_FIELDS[name]
+            for field in self.fields(node.selection_set):
+                cost += self.field_cost(field, size if field.name.value == child else 1)
+            return cost * rows
+        return (cost + self.selection_cost(node.selection_set)) * rows
+
+
+def operation_cost(document, operation_name: Optional[str], variables: Optional[dict]) -> int:
+    fragments = {}
+    operations = []
+    for definition in document.definitions:
+        if isinstance(definition, FragmentDefinitionNode):
+            fragments[definition.name.value] = definition
+        elif isinstance(definition, OperationDefinitionNode):
+            operations.append(definition)
+    if operation_name:
+        operations = [operation for operation in operations if operation.name and operation.name.value == operation_name]
+    if not operations:
+        return 0
+    operation = operations[0]
+    # Variables the request leaves out take their default, as in execution
+    variables = dict(variables or {})
+    for definition in operation.variable_definitions or ():
+        name = definition.variable.name.value
+        if name not in variables and definition.default_value is not None:
+            variables[name] = value_from_ast_untyped(definition.default_value)
+    return QueryCost(fragments, variables).selection_cost(operation.selection_set)
+
+
+class QueryCostLimiter(SchemaExtension):
+    """
+    Rejects operations whose estimated cost exceeds ``max_cost`` before any
+    resolver runs, and reports the cost under ``extensions.cost``.
+
+    List fields cost one unit per row they can return (``perPage``/``first``
+    clamped to MAX_PER_PAGE), so aliasing a large page many times adds up.
+    Register the class, not an instance, so each request gets its own state.
+    """
+
+    max_cost = GRAPHQL_MAX_COST
+    cost: Optional[int] = None
+
+    def on_execute(self):
+        context = self.execution_context
+        self.cost = operation_cost(context.graphql_document, context.operation_name, context.variables)
+        if self.cost > self.max_cost:
+            # A pre-set result makes Strawberry skip execution
+            context.result = ExecutionResult(
+                data=None,
+                errors=[GraphQLError(f"Query cost {self.cost} exceeds the maximum of {self.max_cost}")],
+            )
+        yield
+
+    def get_results(self) -> dict:
+        if self.cost is None:
+            return {}
+        return {"cost": {"requested": self.cost, "maximum": self.max_cost}}
@@ -0,0 +1,102 @@
+import asyncio
+import os
+from datetime import timedelta
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import strawberry
+from dotenv import load_dotenv
+from prisma import Prisma
+
+from metrics import instrument_prisma
+
+
+load_dotenv()
+
+# Connection pool configuration, forwarded to the Prisma query engine as
+# connection string parameters. Unset values keep the engine defaults.
+DB_CONNECTION_LIMIT = os.getenv("DB_CONNECTION_LIMIT")
+DB_POOL_TIMEOUT = os.getenv("DB_POOL_TIMEOUT")  # seconds to wait for a free connection
+DB_STATEMENT_CACHE_SIZE = os.getenv("DB_STATEMENT_CACHE_SIZE")
+DB_SOCKET_TIMEOUT = os.getenv("DB_SOCKET_TIMEOUT")
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "").lower() in {"1", "true", "yes"}
+# Seconds to wait for the query engine to start when connecting
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+# Pooled connections opened on startup, before the worker reports ready
+DB_WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", DB_CONNECTION_LIMIT or "2"))
+
+
+def build_database_url(url: Optional[str]) -> Optional[str]:
+    """
+    Add the pool settings from the environment to a Postgres connection string
+    """
+    if not url:
+        return None
+
+    params = {
+        "connection_limit": DB_CONNECTION_LIMIT,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "socket_timeout": DB_SOCKET_TIMEOUT,
+        "pgbouncer": "true" if DB_PGBOUNCER else None,
+    }
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    for key, value in params.items():
+        # Explicit values in DATABASE_URL win over the environment
+        if value is not None and key not in query:
+            query[key] = value
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+DATABASE_URL = build_database_url(os.getenv("DATABASE_URL"))
+
+# Single Prisma client shared by every schema module
+db = Prisma(
+    datasource={"url": DATABASE_URL} if DATABASE_URL else None,
+    connect_timeout=timedelta(seconds=DB_CONNECT_TIMEOUT),
+)
+# Time every query and count them per GraphQL operation (see /metrics)
+instrument_prisma(db)
+
+
+async def connect_db():
+    if not db.is_connected():
+        await db.connect()
+
+
+async def warm_up_db(connections: int = DB_WARM_CONNECTIONS):
+    """
+    Open ``connections`` pool connections now rather than on the first requests.
+    The queries overlap (each sleeps briefly) so each one needs its own connection.
+    """
+    await asyncio.gather(*(db.execute_raw("SELECT pg_sleep(0.05)") for _ in range(connections)))
+
+
+async def disconnect_db():
+    if db.is_connected():
+        await db.disconnect()
+
+
+def patch_data(input, exclude=(), clearable=()) -> dict:
+    """
+    Prisma ``data`` for a patch-style update: only the input fields the client
+    supplied, so UPDATE touches just those columns. Omitted fields are
+    ``strawberry.UNSET``. An explicit null keeps the stored value, except for
+    the ``clearable`` fields, where it clears the column.
+    """
+    return {
+        name: value
+        for name, value in vars(input).items()
+        if value is not strawberry.UNSET
+        and name not in exclude
+        and (value is not None or name in clearable)
+    }
+
+
+def create_data(input, exclude=()) -> dict:
+    """
+    Prisma ``data`` for a create: the non-null input fields; the other
+    columns take their defaults
+    """
+    return patch_data(input, exclude)
@@ -0,0 +1,119 @@
+import csv
+import datetime
+import io
+import json
+import os
+import typing
+from typing import Optional
+
+from database import db
+from InstructorSchema import Course, Instructor
+from pagination import SORT_FIELDS, keyset_find_many
+from projection import plain_fields
+from search import SEARCH_TABLES
+from StudentSchema import Student
+
+
+# Rows fetched per keyset query while streaming an export
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+EXPORT_FLUSH_BYTES = 64 * 1024
+
+
+class ExportTable(typing.NamedTuple):
+    model: str
+    actions: typing.Any
+    pk_field: str
+    sort_fields: typing.FrozenSet[str]
+    # Exported columns, in order
+    columns: typing.Tuple[str, ...]
+
+
+def output_columns(type_) -> typing.Tuple[str, ...]:
+    """
+    Columns behind the plain fields of a GraphQL output type, so exports
+    follow the schema (which has no password field)
+    """
+    return tuple(field.python_name for field in plain_fields(type_))
+
+
+EXPORT_TABLES = {
+    "students": ExportTable("student", db.student, "id", SORT_FIELDS["student"], output_columns(Student)),
+    "instructors": ExportTable(
+        "instructor", db.instructor, "instructor_id", SORT_FIELDS["instructor"], output_columns(Instructor)
+    ),
+    "courses": ExportTable("course", db.course, "course_id", SORT_FIELDS["course"], output_columns(Course)),
+}
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def search_where(model: str, search: Optional[str]) -> dict:
+    """
+    The case-insensitive ``contains`` filter the list resolvers use for ``search``
+    """
+    if not search:
+        return {}
+    _, _, columns = SEARCH_TABLES[model]
+    return {"OR": [{column: {"contains": search, "mode": "insensitive"}} for column in columns]}
+
+
+async def iter_rows(
+    actions,
+    where: Optional[dict],
+    field: str,
+    direction: str,
+    pk_field: str,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    columns: Optional[typing.Sequence[str]] = None,
+):
+    """
+    Yield every matching row, one keyset-ordered chunk in memory at a time
+    """
+    after = None
+    while True:
+        rows, page_info = await keyset_find_many(actions, where, field, direction, pk_field, chunk_size, after, columns)
+        for row in rows:
+            yield row
+        if not page_info.has_next_page:
+            return
+        after = page_info.end_cursor
+
+
+def _json_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+async def stream_export(
+    table: ExportTable,
+    format: str,
+    search: Optional[str] = None,
+    sort_field: str = "",
+    sort_order: str = "asc",
+) -> typing.AsyncIterator[str]:
+    """
+    Stream ``table`` as NDJSON or CSV, honouring the list resolvers' search and sort rules
+    """
+    field = sort_field if sort_field in table.sort_fields else table.pk_field
+    direction = sort_order.lower() if sort_order.lower() in {"asc", "desc"} else "asc"
+    # Only the exported columns are read, so password hashes never leave the database
+    rows = iter_rows(table.actions, search_where(table.model, search), field, direction, table.pk_field, columns=table.columns)
+
+    buffer = io.StringIO()
+    if format == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(table.columns)
+    async for row in rows:
+        values = [_json_value(getattr(row, column, None)) for column in table.columns]
+        if format == "csv":
+            writer.writerow(["" if value is None else value for value in values])
+        else:
+            buffer.write(json.dumps(dict(zip(table.columns, values))) + "\n")
+        # Send the response in ~64 KB pieces rather than one write per row
+        if buffer.tell() >= EXPORT_FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
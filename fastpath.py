@@ -0,0 +1,275 @@
+import datetime
+import os
+import time
+import typing
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from database import DATABASE_URL, DB_PGBOUNCER
+from metrics import normalize_sql, record_db_query
+from projection import partial_model
+from search import SEARCH_TABLES, escape_like
+
+
+# Read paths that can skip the Prisma query engine and go straight to Postgres
+FAST_PATH_OPERATIONS = frozenset({"login", "get_by_id", "list", "search", "count"})
+
+# Comma-separated FAST_PATH_OPERATIONS served by asyncpg, or "all"; the rest
+# (and every write) stay on Prisma. Needs the asyncpg package.
+DB_FAST_PATH = os.getenv("DB_FAST_PATH", "")
+DB_FAST_PATH_POOL_SIZE = int(os.getenv("DB_FAST_PATH_POOL_SIZE", "10"))
+# Prepared statements kept per connection; transaction poolers need 0
+DB_FAST_PATH_STATEMENT_CACHE_SIZE = int(os.getenv("DB_FAST_PATH_STATEMENT_CACHE_SIZE", "0" if DB_PGBOUNCER else "256"))
+
+COMPARISONS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+PATTERNS = {"contains": "%{}%", "startswith": "{}%", "endswith": "%{}"}
+
+
+def parse_operations(value: str) -> typing.FrozenSet[str]:
+    names = {name.strip().lower() for name in value.split(",") if name.strip()}
+    if "all" in names:
+        return FAST_PATH_OPERATIONS
+    unknown = names - FAST_PATH_OPERATIONS
+    if unknown:
+        raise ValueError(f"Unknown DB_FAST_PATH operations: {', '.join(sorted(unknown))}")
+    return frozenset(names)
+
+
+def asyncpg_connect_args(url: str) -> typing.Tuple[str, dict]:
+    """
+    asyncpg DSN and server settings for a Prisma connection string. Prisma's
+    own parameters (connection_limit, pgbouncer, ...) are dropped and
+    ``schema`` becomes the search_path.
+    """
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    settings = {"search_path": query["schema"]} if query.get("schema") else {}
+    kept = {key: value for key, value in query.items() if key == "sslmode"}
+    return urlunsplit(parts._replace(query=urlencode(kept))), settings
+
+
+def to_db_value(value):
+    # Columns are Prisma's timestamp(3) without time zone, stored in UTC
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def from_db_value(value):
+    # Prisma returns aware UTC datetimes; match it
+    if isinstance(value, datetime.datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+def row_dict(record) -> dict:
+    return {key: from_db_value(value) for key, value in record.items()}
+
+
+class SqlBuilder:
+    """
+    Turns the Prisma ``where``/``order`` dicts the resolvers build into SQL.
+
+    Statements for the same filter shape have the same text, so each one is
+    prepared once per pooled connection and reused.
+    """
+
+    def __init__(self, columns: typing.Iterable[str]):
+        self.columns = set(columns)
+        self.params: typing.List[typing.Any] = []
+
+    def param(self, value) -> str:
+        self.params.append(to_db_value(value))
+        return f"${len(self.params)}"
+
+    def column(self, name: str) -> str:
+        if name not in self.columns:
+            raise ValueError(f"Unknown column {name!r}")
+        return f'"{name}"'
+
+    def where(self, where: Optional[dict]) -> str:
+        if not where:
+            return "TRUE"
+        parts = []
+        for key, condition in where.items():
+            if key in {"AND", "OR"}:
+                conditions = condition if isinstance(condition, list) else [condition]
+                if not conditions:
+                    parts.append("TRUE" if key == "AND" else "FALSE")
+                    continue
+                parts.append("(" + f" {key} ".join(self.where(item) for item in conditions) + ")")
+            elif key == "NOT":
+                parts.append(f"NOT ({self.where(condition)})")
+            elif isinstance(condition, dict):
+                parts.extend(self.field(key, condition))
+            else:
+                parts.append(self.equals(key, condition))
+        return " AND ".join(parts)
+
+    def equals(self, name: str, value) -> str:
+        if value is None:
+            return f"{self.column(name)} IS NULL"
+        return f"{self.column(name)} = {self.param(value)}"
+
+    def field(self, name: str, condition: dict) -> typing.List[str]:
+        column = self.column(name)
+        like = "ILIKE" if condition.get("mode") == "insensitive" else "LIKE"
+        parts = []
+        for op, value in condition.items():
+            if op == "mode":
+                continue
+            if op == "equals":
+                parts.append(self.equals(name, value))
+            elif op in COMPARISONS:
+                parts.append(f"{column} {COMPARISONS[op]} {self.param(value)}")
+            elif op == "in":
+                parts.append(f"{column} = ANY({self.param(list(value))})")
+            elif op == "not_in":
+                parts.append(f"NOT ({column} = ANY({self.param(list(value))}))")
+            elif op in PATTERNS:
+                parts.append(f"{column} {like} {self.param(PATTERNS[op].format(escape_like(value)))}")
+            else:
+                raise ValueError(f"Unsupported filter {op!r} on {name!r}")
+        return parts
+
+    def order(self, order) -> str:
+        if not order:
+            return ""
+        items = order if isinstance(order, list) else [order]
+        terms = []
+        for item in items:
+            for name, direction in item.items():
+                if direction not in {"asc", "desc"}:
+                    raise ValueError(f"Invalid sort direction {direction!r}")
+                terms.append(f"{self.column(name)} {direction.upper()}")
+        return " ORDER BY " + ", ".join(terms)
+
+
+class FastPathActions:
+    """
+    The read subset of a Prisma model's actions (find_unique, find_many,
+    count, query_raw), served over the asyncpg pool. Rows are parsed into
+    the same Prisma model classes.
+    """
+
+    def __init__(self, fast_path: "FastPath", table: str, model: typing.Type):
+        self._client = fast_path
+        self._model = model
+        self.table = table
+
+    def _builder(self) -> SqlBuilder:
+        return SqlBuilder(self._model.model_fields)
+
+    def _select(self, builder: SqlBuilder, columns: Optional[typing.Sequence[str]]) -> str:
+        if columns is None:
+            return "*"
+        return ", ".join(builder.column(column) for column in columns)
+
+    async def find_unique(self, where: dict):
+        builder = self._builder()
+        sql = f'SELECT * FROM "{self.table}" WHERE {builder.where(where)} LIMIT 1'
+        rows = await self._client.fetch(self._model.__name__, "find_unique", sql, *builder.params)
+        return self._model.model_validate(row_dict(rows[0])) if rows else None
+
+    async def find_many(
+        self,
+        where: Optional[dict] = None,
+        skip: Optional[int] = None,
+        take: Optional[int] = None,
+        order=None,
+        columns: Optional[typing.Sequence[str]] = None,
+    ) -> typing.List[typing.Any]:
+        builder = self._builder()
+        sql = f'SELECT {self._select(builder, columns)} FROM "{self.table}" WHERE {builder.where(where)}{builder.order(order)}'
+        if take is not None:
+            sql += f" LIMIT {builder.param(take)}"
+        if skip:
+            sql += f" OFFSET {builder.param(skip)}"
+        rows = await self._client.fetch(self._model.__name__, "find_many", sql, *builder.params)
+        model = self._model if columns is None else partial_model(self._model, frozenset(columns))
+        return [model.model_validate(row_dict(row)) for row in rows]
+
+    async def find_many_columns(self, columns: typing.Sequence[str], **kwargs) -> typing.List[typing.Any]:
+        # Used by projection.find_many_columns instead of a Prisma root selection
+        return await self.find_many(columns=columns, **kwargs)
+
+    async def count(self, where: Optional[dict] = None) -> int:
+        builder = self._builder()
+        sql = f'SELECT count(*) AS count FROM "{self.table}" WHERE {builder.where(where)}'
+        rows = await self._client.fetch(self._model.__name__, "count", sql, *builder.params)
+        return rows[0]["count"]
+
+    async def query_raw(self, query: str, *args) -> typing.List[typing.Any]:
+        return [self._model.model_validate(row) for row in await self._client.query_raw(query, *args)]
+
+
+class FastPath:
+    """
+    Pooled asyncpg connection for the read operations named in
+    ``operations``. Until ``connect`` succeeds every operation uses Prisma.
+    """
+
+    def __init__(self, operations: typing.Iterable[str], url: Optional[str], pool_size: int, statement_cache_size: int):
+        self.operations = frozenset(operations)
+        self.url = url
+        self.pool_size = pool_size
+        self.statement_cache_size = statement_cache_size
+        self._pool = None
+        self._actions: typing.Dict[str, FastPathActions] = {}
+
+    def is_connected(self) -> bool:
+        return self._pool is not None
+
+    def enabled(self, operation: str) -> bool:
+        return self._pool is not None and operation in self.operations
+
+    async def connect(self):
+        if not self.operations or self._pool is not None:
+            return
+        try:
+            import asyncpg
+        except ImportError:
+            raise RuntimeError("DB_FAST_PATH requires the 'asyncpg' package")
+        if not self.url:
+            raise RuntimeError("DB_FAST_PATH requires DATABASE_URL")
+        dsn, settings = asyncpg_connect_args(self.url)
+        self._pool = await asyncpg.create_pool(
+            dsn,
+            min_size=1,
+            max_size=self.pool_size,
+            statement_cache_size=self.statement_cache_size,
+            server_settings=settings,
+        )
+
+    async def close(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await pool.close()
+
+    async def fetch(self, model_name: str, method: str, sql: str, *args) -> typing.List[typing.Any]:
+        started = time.perf_counter()
+        try:
+            return await self._pool.fetch(sql, *args)
+        finally:
+            record_db_query(time.perf_counter() - started, model_name, f"fast_path_{method}", lambda: normalize_sql(sql))
+
+    async def query_raw(self, query: str, *args) -> typing.List[dict]:
+        return [row_dict(row) for row in await self.fetch("raw", "query_raw", query, *args)]
+
+    def actions(self, model: str, prisma_actions) -> FastPathActions:
+        if model not in self._actions:
+            self._actions[model] = FastPathActions(self, SEARCH_TABLES[model][0], prisma_actions._model)
+        return self._actions[model]
+
+
+fast_path = FastPath(parse_operations(DB_FAST_PATH), DATABASE_URL, DB_FAST_PATH_POOL_SIZE, DB_FAST_PATH_STATEMENT_CACHE_SIZE)
+
+
+def read_actions(model: str, operation: str, actions):
+    """
+    Actions for a read ``operation`` on ``model``: the fast path when
+    DB_FAST_PATH enables the operation, else the Prisma ``actions``
+    """
+    if fast_path.enabled(operation):
+        return fast_path.actions(model, actions)
+    return actions
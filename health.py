@@ -0,0 +1,26 @@
+from database import db
+
+
+class HealthState:
+    """
+    Lifecycle of this worker, for the /health endpoints.
+
+    ``ready`` is set once the lifespan startup (database, warm-up) is done
+    and cleared when shutdown begins; ``draining`` is set by serve.py as
+    soon as the worker is told to stop, before in-flight requests finish.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+
+    def readiness(self) -> dict:
+        checks = {
+            "started": self.ready,
+            "accepting": not self.draining,
+            "database": db.is_connected(),
+        }
+        return {"ready": all(checks.values()), "checks": checks}
+
+
+health = HealthState()
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import os
+import typing
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from cache import InMemoryCacheBackend, count_cache, course_list_cache
+from catalog import course_catalog
+from database import DATABASE_URL, db
+from fastpath import asyncpg_connect_args
+
+
+# How mutations reach the caches of other workers: "local" (this process
+# only) or "postgres" (NOTIFY/LISTEN, needs the asyncpg package)
+INVALIDATION_BUS = os.getenv("INVALIDATION_BUS", "local")
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+# Seconds between attempts to re-establish the LISTEN connection
+INVALIDATION_RECONNECT_SECONDS = float(os.getenv("INVALIDATION_RECONNECT_SECONDS", "2"))
+
+# NOTIFY payloads must stay under 8000 bytes; larger key lists are sent as
+# "every key of this entity"
+MAX_KEYS_PER_MESSAGE = 200
+
+logger = logging.getLogger(__name__)
+
+# handler(keys, tags, remote); ``keys`` empty means every row of the entity
+Handler = Callable[[typing.List, typing.List[str], bool], Awaitable[None]]
+
+
+class LocalTransport:
+    """
+    Delivers messages to every bus in this process that shares the transport
+    """
+
+    def __init__(self):
+        self._receivers: typing.List[Callable[[str], None]] = []
+
+    async def send(self, payload: str):
+        for receive in list(self._receivers):
+            receive(payload)
+
+    async def listen(self, receive: Callable[[str], None], reconnected: Callable[[], None]):
+        self._receivers.append(receive)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._receivers.remove(receive)
+
+
+class PostgresTransport:
+    """
+    NOTIFY through the shared Prisma client; LISTEN on a dedicated asyncpg
+    connection, re-established whenever it drops
+    """
+
+    def __init__(self, url: Optional[str], channel: str, reconnect_interval: float):
+        self.url = url
+        self.channel = channel
+        self.reconnect_interval = reconnect_interval
+
+    async def send(self, payload: str):
+        await db.execute_raw("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def listen(self, receive: Callable[[str], None], reconnected: Callable[[], None]):
+        try:
+            import asyncpg
+        except ImportError:
+            raise RuntimeError("INVALIDATION_BUS=postgres requires the 'asyncpg' package")
+        if not self.url:
+            raise RuntimeError("INVALIDATION_BUS=postgres requires DATABASE_URL")
+        dsn, settings = asyncpg_connect_args(self.url)
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn, server_settings=settings)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self.channel, lambda _conn, _pid, _channel, payload: receive(payload))
+                # Whatever was published while no connection listened is lost
+                reconnected()
+                await closed.wait()
+                logger.warning("Invalidation listener connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Invalidation listener failed, retrying in %ss", self.reconnect_interval)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_interval)
+
+
+class InvalidationBus:
+    """
+    Fans cache invalidations out to every worker.
+
+    ``publish`` runs the local handlers for an entity at once and sends the
+    message on the transport; each worker's listener task runs the same
+    handlers (with ``remote=True``) for messages from other workers. After
+    a listener reconnect every entity is invalidated, since messages may
+    have been missed.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.origin = uuid.uuid4().hex
+        self._handlers: typing.Dict[str, typing.List[Handler]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pending: typing.Set[asyncio.Task] = set()
+
+    def subscribe(self, entity: str, handler: Handler):
+        self._handlers.setdefault(entity, []).append(handler)
+
+    async def _apply(self, entity: str, keys: typing.List, tags: typing.List[str], remote: bool):
+        for handler in self._handlers.get(entity, []):
+            try:
+                await handler(keys, tags, remote)
+            except Exception:
+                logger.exception("Invalidating %s %s failed", entity, keys)
+
+    async def publish(self, entity: str, keys: typing.Iterable = (), tags: typing.Iterable[str] = ()):
+        keys, tags = list(keys), list(tags)
+        await self._apply(entity, keys, tags, remote=False)
+        message = {"o": self.origin, "e": entity, "k": keys if len(keys) <= MAX_KEYS_PER_MESSAGE else [], "t": tags}
+        try:
+            await self.transport.send(json.dumps(message, separators=(",", ":")))
+        except Exception:
+            # The write already happened; other workers catch up when their caches expire
+            logger.exception("Publishing the %s invalidation failed", entity)
+
+    def _receive(self, payload: str):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed invalidation message %r", payload)
+            return
+        if message.get("o") == self.origin:
+            return
+        task = asyncio.create_task(self._apply(message["e"], message.get("k", []), message.get("t", []), remote=True))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _reconnected(self):
+        for entity in self._handlers:
+            task = asyncio.create_task(self._apply(entity, [], [], remote=True))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.transport.listen(self._receive, self._reconnected))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def create_transport():
+    if INVALIDATION_BUS == "postgres":
+        return PostgresTransport(DATABASE_URL, INVALIDATION_CHANNEL, INVALIDATION_RECONNECT_SECONDS)
+    return LocalTransport()
+
+
+invalidation_bus = InvalidationBus(create_transport())
+
+
+def evict_count(model: str) -> Handler:
+    async def handler(keys, tags, remote):
+        count_cache.invalidate(model)
+
+    return handler
+
+
+async def evict_courses(keys, tags, remote):
+    # A shared (redis) response cache was already cleared by the publisher
+    if not remote or isinstance(course_list_cache.backend, InMemoryCacheBackend):
+        await course_list_cache.invalidate(tags or ["all"])
+    # The publisher updated its own snapshot with the written rows
+    if remote:
+        await course_catalog.reload(keys)
+
+
+for model in ("student", "instructor", "admin", "course"):
+    invalidation_bus.subscribe(model, evict_count(model))
+invalidation_bus.subscribe("course", evict_courses)
@@ -0,0 +1,102 @@
+import asyncio
+import datetime
+import logging
+import os
+import typing
+from typing import Optional
+
+from database import db
+from search import SEARCH_TABLES
+
+
+# Pending last_login timestamps are written at least this often...
+LAST_LOGIN_FLUSH_MS = int(os.getenv("LAST_LOGIN_FLUSH_MS", "1000"))
+# ...or as soon as this many distinct users are waiting
+LAST_LOGIN_BATCH_SIZE = int(os.getenv("LAST_LOGIN_BATCH_SIZE", "500"))
+
+logger = logging.getLogger(__name__)
+
+
+def last_login_update_query(model: str) -> str:
+    """
+    One UPDATE for a whole batch. Parameters: $1 primary keys, $2 UTC timestamps.
+    """
+    table, pk, _ = SEARCH_TABLES[model]
+    return (
+        f'UPDATE "{table}" AS t SET "last_login" = v.last_login '
+        f"FROM unnest($1::int[], $2::timestamp(3)[]) AS v(pk, last_login) "
+        f'WHERE t."{pk}" = v.pk'
+    )
+
+
+class LastLoginWriter:
+    """
+    Collects login timestamps in memory and writes them in the background.
+
+    Repeated logins by the same user before a flush collapse into one row;
+    each flush issues one UPDATE per model. ``stop`` writes whatever is
+    still pending, so call it before disconnecting the database.
+    """
+
+    def __init__(self, flush_interval: float, batch_size: int):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # model -> {primary key: login time}
+        self._pending: typing.Dict[str, typing.Dict[int, datetime.datetime]] = {}
+        self._full = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    def pending_count(self) -> int:
+        return sum(len(rows) for rows in self._pending.values())
+
+    def record(self, model: str, pk: int, when: Optional[datetime.datetime] = None):
+        self._pending.setdefault(model, {})[pk] = when or datetime.datetime.now(datetime.timezone.utc)
+        if self.pending_count() >= self.batch_size:
+            self._full.set()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Let the loop finish a flush in progress rather than cancel it
+            # with its batch already taken out of _pending
+            self._stopping = True
+            self._full.set()
+            await self._task
+            self._task = None
+            self._stopping = False
+        await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+    async def flush(self):
+        pending, self._pending = self._pending, {}
+        for model, rows in pending.items():
+            if not rows:
+                continue
+            pks = list(rows)
+            timestamps = [
+                rows[pk].astimezone(datetime.timezone.utc).replace(tzinfo=None).isoformat(timespec="milliseconds")
+                for pk in pks
+            ]
+            try:
+                await db.execute_raw(last_login_update_query(model), pks, timestamps)
+            except Exception:
+                logger.exception("Writing %d last_login timestamps for %s failed", len(pks), model)
+                # Retry with the next flush unless a newer login replaced the entry
+                retry = self._pending.setdefault(model, {})
+                for pk, when in rows.items():
+                    retry.setdefault(pk, when)
+
+
+last_login_writer = LastLoginWriter(LAST_LOGIN_FLUSH_MS / 1000, LAST_LOGIN_BATCH_SIZE)
@@ -0,0 +1,92 @@
+import asyncio
+import typing
+
+import strawberry
+from strawberry.dataloader import DataLoader
+
+from database import db
+from fastpath import read_actions
+
+
+def batch_by_key(actions, key_field: str):
+    """
+    Build a DataLoader batch function that fetches all keys with one find_many
+    and returns the rows in key order (None for missing keys).
+    """
+    async def load(keys: typing.List[int]) -> typing.List[typing.Any]:
+        rows = await actions.find_many(where={key_field: {"in": list(keys)}})
+        by_key = {getattr(row, key_field): row for row in rows}
+        return [by_key.get(key) for key in keys]
+
+    return load
+
+
+def enrollment_page_query(parent_field: str, with_status: bool) -> str:
+    """
+    One page of enrollments for each of several parents (courses or students).
+
+    Parameters: $1 parent ids, $2 last enrollment_id already seen (0 for the
+    first page), $3 rows per parent, $4 status when ``with_status``.
+    """
+    status = ' AND e."status" = $4' if with_status else ""
+    return (
+        "SELECT page.* FROM unnest($1::int[]) AS parent(id) "
+        "CROSS JOIN LATERAL ("
+        f'SELECT e.* FROM "Enrollment_Table" AS e WHERE e."{parent_field}" = parent.id AND e."enrollment_id" > $2{status} '
+        'ORDER BY e."enrollment_id" LIMIT $3'
+        ") AS page"
+    )
+
+
+def batch_enrollment_pages(parent_field: str):
+    """
+    DataLoader batch function for keys ``(parent id, status, first, after id)``.
+
+    Keys sharing the page arguments (the usual case: one field under a list)
+    are fetched with a single LATERAL query however many parents there are.
+    Each key gets ``(rows, has_next_page)``.
+    """
+    async def load_group(status, first, after_id, parent_ids):
+        args = [parent_ids, after_id, first + 1]
+        if status:
+            args.append(status)
+        rows = await db.enrollment.query_raw(enrollment_page_query(parent_field, bool(status)), *args)
+        by_parent = {}
+        for row in rows:
+            by_parent.setdefault(getattr(row, parent_field), []).append(row)
+        return {
+            (parent_id, status, first, after_id): (page[:first], len(page) > first)
+            for parent_id, page in ((parent_id, by_parent.get(parent_id, [])) for parent_id in parent_ids)
+        }
+
+    async def load(keys: typing.List[tuple]) -> typing.List[typing.Any]:
+        groups = {}
+        for parent_id, status, first, after_id in keys:
+            groups.setdefault((status, first, after_id), []).append(parent_id)
+        pages = {}
+        for result in await asyncio.gather(*(load_group(*group, ids) for group, ids in groups.items())):
+            pages.update(result)
+        return [pages[key] for key in keys]
+
+    return load
+
+
+def create_loaders() -> dict:
+    """
+    New set of loaders; create one per request so cached rows never leak across requests
+    """
+    return {
+        "student": DataLoader(load_fn=batch_by_key(read_actions("student", "get_by_id", db.student), "id")),
+        "instructor": DataLoader(load_fn=batch_by_key(read_actions("instructor", "get_by_id", db.instructor), "instructor_id")),
+        "admin": DataLoader(load_fn=batch_by_key(read_actions("admin", "get_by_id", db.admin), "admin_id")),
+        "course": DataLoader(load_fn=batch_by_key(read_actions("course", "get_by_id", db.course), "course_id")),
+        "course_enrollments": DataLoader(load_fn=batch_enrollment_pages("course_id")),
+        "student_enrollments": DataLoader(load_fn=batch_enrollment_pages("student_id")),
+    }
+
+
+def get_loader(info: strawberry.Info, name: str) -> DataLoader:
+    loaders = info.context.get("loaders")
+    if loaders is None:
+        loaders = info.context["loaders"] = create_loaders()
+    return loaders[name]
@@ -1,67 +1,69 @@
-from fastapi import FastAPI, Depends, HTTPException, status 
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware  
-from strawberry.fastapi import GraphQLRouter
+from strawberry.extensions import QueryDepthLimiter
+from strawberry.tools import merge_types
 import strawberry
-import jwt
-from StudentSchema import Query as StudentQuery, Mutation as StudentMutation, db as student_db, Student as StudentType, StudentInput as StudentInputType, LoginResponse as StudentLoginResponse, StudentPaginatedResponse, SECRET_KEY, ALGORITHM
-from AdminSchema import (
-    Query as AdminQuery, 
-    Mutation as AdminMutation, 
-    db as admin_db, 
-    Admin as AdminType, 
-    AdminInput as AdminInputType,
-    AdminLoginResponse,
-    AdminPaginatedResponse
-)
+from StudentSchema import Query as StudentQuery, Mutation as StudentMutation, StudentInput as StudentInputType, import_students
+from AdminSchema import Query as AdminQuery, Mutation as AdminMutation
 from InstructorSchema import (
     Query as InstructorQuery,
     Mutation as InstructorMutation,
-    db as instructor_db,
-    Instructor as InstructorType,
-    InstructorPaginatedResponse,
     InstructorInput as InstructorInputType,
-    InstructorLoginResponse,
-    Course as CourseType,
-    CoursePaginatedResponse,
-    CourseInput as CourseInputType,
+    import_instructors,
 )
+from EnrollmentSchema import Mutation as EnrollmentMutation
+from auth import verify_token, get_graphql_context
+from bulk_import import bulk_password_hasher, detect_format, inputs_from_upload, require_admin
+from complexity import GRAPHQL_MAX_DEPTH, QueryCostLimiter
+from database import connect_db, db, disconnect_db, warm_up_db
+from health import health
+from fastpath import fast_path
+from persisted_queries import CachedDocuments, PersistedQueryRouter, document_cache
+from metrics import Gauge, MetricsExtension, registry
+from export import EXPORT_TABLES, MEDIA_TYPES, stream_export
+from passwords import password_hasher
+from last_login import last_login_writer
+from catalog import CATALOG_SNAPSHOT, course_catalog
+from invalidation import invalidation_bus
+from sort_indexes import DB_CHECK_SORT_INDEXES, check_sort_indexes
 from contextlib import asynccontextmanager
+import asyncio
+import dataclasses
 import typing
 
-security = HTTPBearer()
-
-# Token verification function
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has expired"
-        )
-    except jwt.JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-
 # Use the lifespan context manager for startup and shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Connect to the database when the app starts
-    await student_db.connect()
-    await admin_db.connect()
-    await instructor_db.connect()
+    # Connect the shared database client while the hashing pool warms up
+    await asyncio.gather(connect_db(), fast_path.connect(), password_hasher.warm_up())
+    last_login_writer.start()
+    if DB_CHECK_SORT_INDEXES:
+        await check_sort_indexes(db)
+    if CATALOG_SNAPSHOT:
+        # list_courses reads memory from here on; the task keeps it current
+        await course_catalog.load()
+        course_catalog.start()
+    # Evict this worker's caches when another worker writes
+    invalidation_bus.start()
+    # Open pooled connections and run one operation through the schema so
+    # the first real requests pay for neither
+    await warm_up_db()
+    await schema.execute("query Warmup { __typename }")
+    health.ready = True
 
     # Disconnect from the database when the app shuts down
     yield
 
-    await student_db.disconnect()
-    await admin_db.disconnect()
-    await instructor_db.disconnect()
+    health.ready = False
+    await invalidation_bus.stop()
+    await course_catalog.stop()
+    # Write the last_login timestamps still queued while the database is up
+    await last_login_writer.stop()
+    await fast_path.close()
+    await disconnect_db()
+    password_hasher.shutdown()
+    bulk_password_hasher.shutdown()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -73,145 +75,41 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-@strawberry.type
-class Query:
-    # Student queries
-    @strawberry.field
-    async def get_student(self, id: strawberry.ID) -> StudentType:
-        return await StudentQuery().get_student(id)
-
-    @strawberry.field
-    async def list_students(
-        self,
-        page: int = 1,
-        per_page: int = 10,
-        sort_field: str = "id",
-        sort_order: str = "asc",
-        search: typing.Optional[str] = None,
-    ) -> StudentPaginatedResponse:
-        return await StudentQuery().list_students(
-            page=page,
-            per_page=per_page,
-            sort_field=sort_field,
-            sort_order=sort_order,
-            search=search,
-        )
-
-    @strawberry.field
-    async def login_student(self, email: str, password: str) -> StudentLoginResponse:
-        return await StudentQuery().login_student(email, password)
-
-    # Admin queries
-    @strawberry.field
-    async def login_admin(self, email: str, password: str) -> AdminLoginResponse:
-        return await AdminQuery().login_admin(email, password)
-
-    @strawberry.field
-    async def list_admins_paginated(
-        self,
-        page: int = 1,
-        per_page: int = 10,
-        sort_field: str = "admin_id",
-        sort_order: str = "asc",
-        search: typing.Optional[str] = None,
-    ) -> AdminPaginatedResponse:
-        return await AdminQuery().list_admins_paginated(
-            page=page,
-            per_page=per_page,
-            sort_field=sort_field,
-            sort_order=sort_order,
-            search=search
-        )
-
-    @strawberry.field
-    async def get_admin(self, admin_id: int) -> AdminType:
-        return await AdminQuery().get_admin(admin_id)
-
-    @strawberry.field
-    async def list_instructors(
-        self,
-        page: int = 1,
-        per_page: int = 10,
-        sort_field: str = "instructor_id",
-        sort_order: str = "asc",
-        search: typing.Optional[str] = None,
-    ) -> InstructorPaginatedResponse:
-        return await AdminQuery().list_instructors(
-            page=page,
-            per_page=per_page,
-            sort_field=sort_field,
-            sort_order=sort_order,
-            search=search,
-        )
-
-    @strawberry.field
-    async def get_instructor(self, instructor_id: int) -> InstructorType:
-        return await InstructorQuery().get_instructor(instructor_id)
-
-    # Instructor queries
-    @strawberry.field
-    async def login_instructor(self, email: str, password: str) -> InstructorLoginResponse:
-        return await InstructorQuery().login_instructor(email, password)
-
-    @strawberry.field
-    async def list_courses(
-        self,
-        page: int = 1,
-        per_page: int = 10,
-        sort_field: str = "course_id",
-        sort_order: str = "asc",
-        search: typing.Optional[str] = None,
-    ) -> CoursePaginatedResponse:
-        return await InstructorQuery().list_courses(
-            page=page,
-            per_page=per_page,
-            sort_field=sort_field,
-            sort_order=sort_order,
-            search=search,
-        )
-
-@strawberry.type
-class Mutation:
-    # Student mutations
-    @strawberry.mutation
-    async def register_student(self, input: StudentInputType) -> StudentType:
-        return await StudentMutation().register_student(input)
-
-    @strawberry.mutation
-    async def update_student(self, id: int, input: StudentInputType) -> StudentType:
-        return await StudentMutation().update_student(id, input)
-
-    # Admin mutations
-    @strawberry.mutation
-    async def register_admin(self, input: AdminInputType) -> AdminType:
-        return await AdminMutation().register_admin(input)
-
-    @strawberry.mutation
-    async def update_admin(self, admin_id: int, input: AdminInputType) -> AdminType:
-        return await AdminMutation().update_admin(admin_id, input)
-
-    # Instructor mutations
-    @strawberry.mutation
-    async def register_instructor(self, input: InstructorInputType) -> InstructorType:
-        return await InstructorMutation().register_instructor(input)
-
-    @strawberry.mutation
-    async def update_instructor(self, instructor_id: int, input: InstructorInputType) -> InstructorType:
-        return await InstructorMutation().update_instructor(instructor_id, input)
-
-    @strawberry.mutation
-    async def create_course(self, input: CourseInputType) -> CourseType:
-        return await InstructorMutation().create_course(input)
-
-    @strawberry.mutation
-    async def update_course(self, course_id: int, input: CourseInputType) -> CourseType:
-        return await InstructorMutation().update_course(course_id, input)
+def merge_root_types(name: str, types: tuple) -> type:
+    """
+    merge_types that fails on a field defined by more than one type; strawberry
+    only warns and lets one definition silently shadow the other
+    """
+    seen = {}
+    for type_ in types:
+        owner = f"{type_.__module__}.{type_.__qualname__}"
+        for field in type_.__strawberry_definition__.fields:
+            if field.python_name in seen:
+                raise TypeError(
+                    f"{name}.{field.python_name} is defined by both {seen[field.python_name]} and {owner}"
+                )
+            seen[field.python_name] = owner
+    return merge_types(name, types)
+
+
+# One root type per operation, merged from the per-model schemas so their
+# resolvers are called directly
+Query = merge_root_types("Query", (StudentQuery, AdminQuery, InstructorQuery))
+Mutation = merge_root_types("Mutation", (StudentMutation, AdminMutation, InstructorMutation, EnrollmentMutation))
 
 # Create the GraphQL schema using combined Query and Mutation
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    # Reject overly deep or expensive documents before any resolver runs
+    # Known-good documents skip parsing and validation
+    extensions=[MetricsExtension, CachedDocuments, QueryDepthLimiter(max_depth=GRAPHQL_MAX_DEPTH), QueryCostLimiter],
+)
 
-# Create the GraphQL router
-graphql_app = GraphQLRouter(schema)
+# Create the GraphQL router; the bearer token is verified once per request
+# and resolvers get the claims from auth.get_current_user(info).
+# Clients may send a persisted query hash instead of the full document.
+graphql_app = PersistedQueryRouter(schema, context_getter=get_graphql_context)
 
 # Include the GraphQL route in the FastAPI app
 app.include_router(graphql_app, prefix="/graphql")
@@ -222,4 +120,96 @@ async def protected_route(token_data: dict = Depends(verify_token)):
     return {
         "message": "This is a protected route",
         "user": token_data
-    }
\ No newline at end of file
+    }
+
+
+# Bulk import from an uploaded CSV (header row first) or NDJSON body.
+# Columns are the StudentInput / InstructorInput fields; admins only.
+async def import_upload(request: Request, format: typing.Optional[str], token_data: dict, input_cls, run_import) -> dict:
+    require_admin(token_data)
+    upload_format = detect_format(request.headers.get("content-type"), format)
+    try:
+        inputs, errors = inputs_from_upload(input_cls, await request.body(), upload_format)
+        result = await run_import(inputs, errors)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Validation error: {str(e)}")
+    return dataclasses.asdict(result)
+
+
+@app.post("/import/students")
+async def import_students_upload(request: Request, format: typing.Optional[str] = None, token_data: dict = Depends(verify_token)):
+    return await import_upload(request, format, token_data, StudentInputType, import_students)
+
+
+@app.post("/import/instructors")
+async def import_instructors_upload(request: Request, format: typing.Optional[str] = None, token_data: dict = Depends(verify_token)):
+    return await import_upload(request, format, token_data, InstructorInputType, import_instructors)
+
+
+# Stream a whole table as NDJSON or CSV; admins only. Takes the same
+# search / sort_field / sort_order parameters as the list queries.
+@app.get("/export/{table}")
+async def export_table(
+    table: str,
+    format: str = "ndjson",
+    search: typing.Optional[str] = None,
+    sort_field: str = "",
+    sort_order: str = "asc",
+    token_data: dict = Depends(verify_token),
+):
+    require_admin(token_data)
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown export table '{table}'")
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    return StreamingResponse(
+        stream_export(EXPORT_TABLES[table], format, search, sort_field, sort_order),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
+
+
+registry.register(Gauge(
+    "password_hash_queue_depth",
+    "bcrypt calls waiting for a hashing slot",
+    ("pool",),
+    lambda: {("login",): password_hasher.stats()["queue_depth"], ("bulk_import",): bulk_password_hasher.stats()["queue_depth"]},
+))
+registry.register(Gauge(
+    "password_hash_in_flight",
+    "bcrypt calls running",
+    ("pool",),
+    lambda: {("login",): password_hasher.stats()["in_flight"], ("bulk_import",): bulk_password_hasher.stats()["in_flight"]},
+))
+registry.register(Gauge(
+    "graphql_document_cache_entries",
+    "Parsed and validated documents cached for persisted queries",
+    (),
+    lambda: {(): document_cache.stats()["size"]},
+))
+registry.register(Gauge(
+    "last_login_pending",
+    "Login timestamps waiting for the next batched write",
+    (),
+    lambda: {(): last_login_writer.pending_count()},
+))
+
+
+# Liveness: the worker's event loop is answering
+@app.get("/health/live")
+async def liveness():
+    return {"status": "ok"}
+
+
+# Readiness: started, connected and not shutting down; load balancers and
+# orchestrators should only route traffic here while this returns 200
+@app.get("/health/ready")
+async def readiness():
+    state = health.readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+# Prometheus scrape endpoint
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
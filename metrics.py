@@ -0,0 +1,297 @@
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+import typing
+from inspect import isawaitable
+from typing import Callable, Optional
+
+from strawberry.extensions import SchemaExtension
+
+
+# Database calls slower than this are logged with their query shape
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+# Distinct client-supplied operation names tracked before the rest become "other"
+METRICS_MAX_OPERATION_NAMES = int(os.getenv("METRICS_MAX_OPERATION_NAMES", "200"))
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: typing.Sequence[str], values: typing.Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: typing.Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> typing.Iterator[str]:
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: typing.Sequence[str] = (),
+        buckets: typing.Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # label values -> [bucket counts..., sum, count]
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> typing.Iterator[str]:
+        with self._lock:
+            values = {key: list(series) for key, series in self._values.items()}
+        for key, series in sorted(values.items()):
+            for bound, count in zip(self.buckets, series):
+                le = 'le="%s"' % _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {count}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}"
+
+
+class Gauge:
+    """
+    Gauge read from ``callback`` at scrape time; the callback returns
+    ``{label values tuple: value}``
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: typing.Sequence[str], callback: Callable[[], dict]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self) -> typing.Iterator[str]:
+        for key, value in sorted(self.callback().items()):
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+OPERATION_DURATION = registry.register(Histogram(
+    "graphql_operation_duration_seconds",
+    "GraphQL operation latency",
+    ("operation_type", "operation_name"),
+))
+OPERATION_ERRORS = registry.register(Counter(
+    "graphql_operation_errors_total",
+    "GraphQL operations that returned errors",
+    ("operation_type", "operation_name"),
+))
+RESOLVER_DURATION = registry.register(Histogram(
+    "graphql_resolver_duration_seconds",
+    "Latency of async GraphQL resolvers",
+    ("field",),
+))
+DB_QUERY_DURATION = registry.register(Histogram(
+    "db_query_duration_seconds",
+    "Prisma query latency",
+    ("model", "method"),
+))
+DB_QUERIES_PER_OPERATION = registry.register(Histogram(
+    "graphql_db_queries_per_operation",
+    "Database queries issued by one GraphQL operation",
+    ("operation_type", "operation_name"),
+    buckets=COUNT_BUCKETS,
+))
+DB_SLOW_QUERIES = registry.register(Counter(
+    "db_slow_queries_total",
+    "Prisma queries slower than DB_SLOW_QUERY_MS",
+    ("model", "method"),
+))
+
+
+class RequestStats:
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+# Stats of the GraphQL operation running in the current task (tasks started
+# with asyncio.gather inherit it)
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request", default=None)
+
+
+_SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def query_shape(arguments) -> typing.Any:
+    """
+    Argument structure with every value replaced by ``?``, so queries that
+    differ only in their values share a shape
+    """
+    if isinstance(arguments, dict):
+        return {key: query_shape(value) for key, value in arguments.items()}
+    if isinstance(arguments, (list, tuple)):
+        return [query_shape(arguments[0])] if arguments else []
+    return "?"
+
+
+def normalize_sql(sql: str) -> str:
+    return " ".join(_SQL_LITERAL.sub("?", sql).split())
+
+
+def record_db_query(elapsed: float, model_name: str, method_name: str, describe: Callable[[], typing.Any]):
+    """
+    Account one finished database query: latency histogram, per-operation
+    stats and the slow query log (``describe`` gives its normalized shape)
+    """
+    DB_QUERY_DURATION.observe(elapsed, model=model_name, method=method_name)
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += elapsed
+    if elapsed * 1000 >= DB_SLOW_QUERY_MS:
+        DB_SLOW_QUERIES.inc(model=model_name, method=method_name)
+        logger.warning("Slow query %.1fms %s.%s %s", elapsed * 1000, model_name, method_name, describe())
+
+
+def instrument_prisma(client):
+    """
+    Wrap ``client._execute`` (every model action and raw query goes through
+    it) to time queries, count them per GraphQL operation and log slow ones
+    """
+    execute = client._execute
+
+    async def instrumented_execute(*, method, arguments, model=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await execute(method=method, arguments=arguments, model=model, **kwargs)
+        finally:
+            raw = arguments.get("query") if isinstance(arguments, dict) else None
+            record_db_query(
+                time.perf_counter() - started,
+                model.__name__ if model is not None else "raw",
+                getattr(method, "value", method),
+                lambda: normalize_sql(raw) if isinstance(raw, str) else query_shape(arguments),
+            )
+
+    client._execute = instrumented_execute
+    return client
+
+
+_operation_names: typing.Set[str] = set()
+
+
+def operation_label(name: Optional[str]) -> str:
+    # Operation names come from clients; cap them to bound label cardinality
+    if not name:
+        return "anonymous"
+    if name not in _operation_names:
+        if len(_operation_names) >= METRICS_MAX_OPERATION_NAMES:
+            return "other"
+        _operation_names.add(name)
+    return name
+
+
+class MetricsExtension(SchemaExtension):
+    """
+    Records operation and resolver latency and database queries per
+    operation. Register the class, not an instance.
+    """
+
+    def on_operation(self):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            current_request.reset(token)
+            context = self.execution_context
+            try:
+                operation_type = context.operation_type.value
+            except Exception:
+                operation_type = "unknown"
+            labels = {"operation_type": operation_type, "operation_name": operation_label(context.operation_name)}
+            OPERATION_DURATION.observe(time.perf_counter() - started, **labels)
+            DB_QUERIES_PER_OPERATION.observe(stats.db_queries, **labels)
+            if context.pre_execution_errors or (context.result is not None and context.result.errors):
+                OPERATION_ERRORS.inc(**labels)
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        started = time.perf_counter()
+        result = _next(root, info, *args, **kwargs)
+        # Plain attribute lookups are not worth timing
+        if not isawaitable(result):
+            return result
+        return self._timed(result, f"{info.parent_type.name}.{info.field_name}", started)
+
+    async def _timed(self, result, field: str, started: float):
+        try:
+            return await result
+        finally:
+            RESOLVER_DURATION.observe(time.perf_counter() - started, field=field)
@@ -0,0 +1,262 @@
+import asyncio
+import base64
+import datetime
+import json
+import os
+import typing
+from typing import Optional
+
+import strawberry
+from strawberry.types.nodes import SelectedField
+
+from cache import count_cache
+from fastpath import read_actions
+from projection import find_many_columns
+from search import ranked_find_many
+
+
+DEFAULT_PER_PAGE = 10
+# Upper bound on per_page / first for every list resolver
+MAX_PER_PAGE = int(os.getenv("MAX_PER_PAGE", "100"))
+
+# Columns each list resolver may sort by. Every one needs a (column, primary
+# key) btree index; sort_indexes.check_sort_indexes warns at startup if not.
+SORT_FIELDS = {
+    "student": frozenset({"id", "first_name", "last_name", "email", "created_at", "updated_at"}),
+    "instructor": frozenset({"instructor_id", "first_name", "last_name", "email", "account_status", "created_at", "updated_at"}),
+    "admin": frozenset({"admin_id", "first_name", "last_name", "email", "account_status", "created_at", "updated_at"}),
+    "course": frozenset({"course_id", "course_title", "course_status", "created_at", "updated_at"}),
+}
+
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: Optional[str]
+
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(field: str, direction: str, value, pk) -> str:
+    """
+    Build an opaque cursor from the sort column value and primary key of a row
+    """
+    payload = {"f": field, "o": direction, "v": _encode_value(value), "k": pk}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return {
+            "field": payload["f"],
+            "direction": payload["o"],
+            "value": _decode_value(payload["v"]),
+            "pk": payload["k"],
+        }
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def cursor_for(row, field: str, direction: str, pk_field: str) -> str:
+    return encode_cursor(field, direction, getattr(row, field), getattr(row, pk_field))
+
+
+def keyset_order(field: str, direction: str, pk_field: str) -> typing.List[dict]:
+    # The primary key breaks ties so the ordering is total and stable
+    if field == pk_field:
+        return [{pk_field: direction}]
+    return [{field: direction}, {pk_field: direction}]
+
+
+def keyset_where(where: Optional[dict], field: str, direction: str, pk_field: str, after: str) -> dict:
+    """
+    Combine a filter with the seek condition for rows that come after the cursor
+    """
+    cursor = decode_cursor(after)
+    if cursor["field"] != field or cursor["direction"] != direction:
+        raise ValueError("Cursor does not match the requested sort_field/sort_order")
+
+    op = "gt" if direction == "asc" else "lt"
+    if field == pk_field:
+        seek = {pk_field: {op: cursor["pk"]}}
+    else:
+        # The redundant gte/lte bound lets the (field, pk) index start the
+        # scan at the cursor instead of filtering from the first row
+        seek = {
+            "AND": [
+                {field: {op + "e": cursor["value"]}},
+                {
+                    "OR": [
+                        {field: {op: cursor["value"]}},
+                        {field: {"equals": cursor["value"]}, pk_field: {op: cursor["pk"]}},
+                    ]
+                },
+            ]
+        }
+    if where:
+        return {"AND": [where, seek]}
+    return seek
+
+
+async def keyset_find_many(
+    actions,
+    where: Optional[dict],
+    field: str,
+    direction: str,
+    pk_field: str,
+    first: int,
+    after: Optional[str],
+    columns: Optional[typing.Sequence[str]] = None,
+):
+    """
+    Fetch the next ``first`` rows after the cursor without an OFFSET scan.
+
+    ``columns`` limits the selected columns (all when None). Returns the rows
+    and the PageInfo for the page.
+    """
+    if after:
+        where = keyset_where(where, field, direction, pk_field, after)
+
+    # Fetch one extra row to learn whether another page exists
+    rows = await find_many_columns(
+        actions,
+        columns,
+        where=where if where else None,
+        take=first + 1,
+        order=keyset_order(field, direction, pk_field),
+    )
+    has_next_page = len(rows) > first
+    rows = rows[:first]
+    end_cursor = cursor_for(rows[-1], field, direction, pk_field) if rows else None
+    return rows, PageInfo(has_next_page=has_next_page, end_cursor=end_cursor)
+
+
+async def offset_find_many(
+    actions,
+    where: Optional[dict],
+    field: str,
+    direction: str,
+    pk_field: str,
+    skip: int,
+    take: int,
+    columns: Optional[typing.Sequence[str]] = None,
+):
+    rows = await find_many_columns(
+        actions,
+        columns,
+        where=where if where else None,
+        skip=skip,
+        take=take + 1,
+        order=keyset_order(field, direction, pk_field),
+    )
+    has_next_page = len(rows) > take
+    rows = rows[:take]
+    end_cursor = cursor_for(rows[-1], field, direction, pk_field) if rows else None
+    return rows, PageInfo(has_next_page=has_next_page, end_cursor=end_cursor)
+
+
+async def ranked_page(actions, model: str, search: str, skip: int, take: int, columns: Optional[typing.Sequence[str]] = None):
+    rows = await ranked_find_many(actions, model, search, skip, take, columns)
+    has_next_page = len(rows) > take
+    # Relevance pages have no seekable cursor
+    return rows[:take], PageInfo(has_next_page=has_next_page, end_cursor=None)
+
+
+def requested_fields(info: Optional[strawberry.Info]) -> Optional[typing.Set[str]]:
+    """
+    Names of the fields selected below the current field, with fragments expanded.
+
+    Returns None when there is no resolver info, meaning "assume everything".
+    """
+    if info is None:
+        return None
+
+    names: typing.Set[str] = set()
+
+    def walk(selections):
+        for selection in selections:
+            if isinstance(selection, SelectedField):
+                names.add(selection.name)
+            else:
+                walk(selection.selections)
+
+    for field in info.selected_fields:
+        walk(field.selections)
+    return names
+
+
+async def _none():
+    return None
+
+
+async def paginate(
+    actions,
+    model: str,
+    info: Optional[strawberry.Info],
+    where: Optional[dict],
+    field: str,
+    direction: str,
+    pk_field: str,
+    page: int,
+    per_page: int,
+    first: Optional[int] = None,
+    after: Optional[str] = None,
+    search: Optional[str] = None,
+    columns: Optional[typing.Sequence[str]] = None,
+):
+    """
+    Fetch one page of ``actions`` plus whichever counts the client selected.
+
+    ``field="relevance"`` ranks rows by trigram similarity to ``search``
+    through a raw query; it supports page/per_page only. ``per_page`` and
+    ``first`` are clamped to MAX_PER_PAGE.
+
+    The unfiltered total comes from ``count_cache``; the filtered count runs
+    concurrently with the page query. Counts that were not selected are None.
+    Rows and counts come from the asyncpg fast path for the operations
+    DB_FAST_PATH enables (see fastpath.read_actions).
+    ``columns`` (from ``projection.selected_columns``) limits the columns
+    fetched for each row; it must include ``pk_field`` and ``field``.
+    Returns (rows, total_count, filtered_count, page_info).
+    """
+    per_page = min(per_page, MAX_PER_PAGE)
+    if first is not None:
+        first = min(first, MAX_PER_PAGE)
+    # Each read may be switched to the asyncpg fast path (DB_FAST_PATH)
+    count_actions = read_actions(model, "count", actions)
+
+    wanted = requested_fields(info)
+    want_total = wanted is None or "totalCount" in wanted
+    want_filtered = wanted is None or "filteredCount" in wanted
+
+    if field == "relevance":
+        if first is not None or after is not None:
+            raise ValueError("relevance sorting does not support first/after, use page/per_page")
+        fetch = ranked_page(read_actions(model, "search", actions), model, search, (page - 1) * per_page, per_page, columns)
+    elif first is not None or after is not None:
+        fetch = keyset_find_many(read_actions(model, "list", actions), where, field, direction, pk_field, first if first and first > 0 else per_page, after, columns)
+    else:
+        fetch = offset_find_many(read_actions(model, "list", actions), where, field, direction, pk_field, (page - 1) * per_page, per_page, columns)
+
+    # Without a filter the filtered count is the (cached) total
+    need_total = want_total or (want_filtered and not where)
+    total_count, filtered_count, (rows, page_info) = await asyncio.gather(
+        count_cache.count(count_actions, model) if need_total else _none(),
+        count_actions.count(where=where) if want_filtered and where else _none(),
+        fetch,
+    )
+    if want_filtered and not where:
+        filtered_count = total_count
+    return rows, total_count, filtered_count, page_info
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import typing
+from collections import OrderedDict
+from typing import Optional
+
+from graphql import DocumentNode, FieldNode, GraphQLError, OperationDefinitionNode
+from strawberry.extensions import SchemaExtension
+from strawberry.fastapi import GraphQLRouter
+from strawberry.types import ExecutionResult
+
+
+# Parsed and validated documents kept in memory, keyed by SHA-256 of the query
+APQ_CACHE_SIZE = int(os.getenv("APQ_CACHE_SIZE", "1000"))
+# Cache-Control max-age for anonymous GET reads of public fields (0 disables)
+GRAPHQL_GET_MAX_AGE = int(os.getenv("GRAPHQL_GET_MAX_AGE", "60"))
+
+# Root fields whose anonymous GET responses may be cached by a CDN or proxy
+PUBLIC_CACHEABLE_FIELDS = {"listCourses", "__typename"}
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class DocumentCache:
+    """
+    LRU of query text and its parsed, validated document, keyed by the
+    query's SHA-256 digest (the hash clients send for persisted queries).
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, typing.Tuple[str, DocumentNode]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, digest: str) -> Optional[typing.Tuple[str, DocumentNode]]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(digest)
+        return entry
+
+    def query(self, digest: str) -> Optional[str]:
+        entry = self._get(digest)
+        return entry[0] if entry else None
+
+    def document(self, query: str) -> Optional[DocumentNode]:
+        entry = self._get(query_hash(query))
+        # Guard against the (theoretical) digest collision
+        return entry[1] if entry and entry[0] == query else None
+
+    def set(self, query: str, document: DocumentNode):
+        if self.maxsize <= 0:
+            return
+        digest = query_hash(query)
+        self._entries[digest] = (query, document)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+document_cache = DocumentCache(APQ_CACHE_SIZE)
+
+
+class CachedDocuments(SchemaExtension):
+    """
+    Skips parsing and validation for documents that already passed both.
+
+    Only valid documents are cached, so a cached document needs no further
+    validation (the rules depend on the schema alone). Register the class,
+    not an instance, so each request gets its own state.
+    """
+
+    cached = False
+
+    def on_parse(self):
+        context = self.execution_context
+        if context.query and context.graphql_document is None:
+            document = document_cache.document(context.query)
+            if document is not None:
+                context.graphql_document = document
+                self.cached = True
+        yield
+
+    def on_validate(self):
+        context = self.execution_context
+        if self.cached:
+            # An empty error list makes Strawberry skip validation
+            context.pre_execution_errors = []
+        yield
+        if not self.cached and not context.pre_execution_errors and context.graphql_document is not None:
+            document_cache.set(context.query, context.graphql_document)
+
+
+def persisted_query_hash(extensions: Optional[dict]) -> Optional[str]:
+    """
+    The ``sha256Hash`` of an Apollo-style ``persistedQuery`` request extension
+    """
+    persisted = (extensions or {}).get("persistedQuery")
+    if not isinstance(persisted, dict) or persisted.get("version") != 1:
+        return None
+    digest = persisted.get("sha256Hash")
+    return digest.lower() if isinstance(digest, str) else None
+
+
+def root_fields(document: DocumentNode, operation_name: Optional[str]) -> Optional[typing.Set[str]]:
+    operations = [definition for definition in document.definitions if isinstance(definition, OperationDefinitionNode)]
+    if operation_name:
+        operations = [operation for operation in operations if operation.name and operation.name.value == operation_name]
+    if len(operations) != 1:
+        return None
+    names = set()
+    for selection in operations[0].selection_set.selections:
+        if not isinstance(selection, FieldNode):
+            # Fragments on the root type are not worth analysing here
+            return None
+        names.add(selection.name.value)
+    return names
+
+
+def _error(message: str, code: str) -> ExecutionResult:
+    return ExecutionResult(data=None, errors=[GraphQLError(message, extensions={"code": code})])
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """
+    GraphQLRouter with automatic persisted queries (Apollo APQ protocol).
+
+    A client first sends only ``extensions.persistedQuery.sha256Hash``; on a
+    ``PersistedQueryNotFound`` error it retries with the full query, which is
+    then cached for every later request with that hash. Hash-only queries
+    also work over GET, and anonymous GET reads of PUBLIC_CACHEABLE_FIELDS
+    get a Cache-Control header so a CDN can serve them.
+    """
+
+    def should_render_graphql_ide(self, request) -> bool:
+        # A GET carrying a persisted query hash is an operation, not a browser visit
+        if "extensions" in request.query_params:
+            return False
+        return super().should_render_graphql_ide(request)
+
+    async def execute_single(self, request, request_adapter, sub_response, context, root_value, request_data):
+        digest = persisted_query_hash(request_data.extensions)
+        if digest is not None:
+            if request_data.query is None:
+                request_data.query = document_cache.query(digest)
+                if request_data.query is None:
+                    return _error("PersistedQueryNotFound", "PERSISTED_QUERY_NOT_FOUND")
+            elif query_hash(request_data.query) != digest:
+                return _error("provided sha does not match query", "BAD_REQUEST")
+
+        result = await super().execute_single(
+            request=request,
+            request_adapter=request_adapter,
+            sub_response=sub_response,
+            context=context,
+            root_value=root_value,
+            request_data=request_data,
+        )
+
+        if (
+            request_adapter.method == "GET"
+            and GRAPHQL_GET_MAX_AGE > 0
+            and not result.errors
+            and "authorization" not in request.headers
+        ):
+            document = document_cache.document(request_data.query)
+            fields = root_fields(document, request_data.operation_name) if document is not None else None
+            if fields and fields <= PUBLIC_CACHEABLE_FIELDS:
+                sub_response.headers["Cache-Control"] = f"public, max-age={GRAPHQL_GET_MAX_AGE}"
+        return result
@@ -0,0 +1,41 @@
+-- CreateExtension
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
+-- CreateIndex
+CREATE INDEX "Student_Table_first_name_trgm_idx" ON "Student_Table" USING GIN ("first_name" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Student_Table_last_name_trgm_idx" ON "Student_Table" USING GIN ("last_name" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Student_Table_email_trgm_idx" ON "Student_Table" USING GIN ("email" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Instructor_Table_first_name_trgm_idx" ON "Instructor_Table" USING GIN ("first_name" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Instructor_Table_last_name_trgm_idx" ON "Instructor_Table" USING GIN ("last_name" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Instructor_Table_email_trgm_idx" ON "Instructor_Table" USING GIN ("email" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Admin_Table_first_name_trgm_idx" ON "Admin_Table" USING GIN ("first_name" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Admin_Table_last_name_trgm_idx" ON "Admin_Table" USING GIN ("last_name" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Admin_Table_email_trgm_idx" ON "Admin_Table" USING GIN ("email" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Course_Table_course_title_trgm_idx" ON "Course_Table" USING GIN ("course_title" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Course_Table_course_status_trgm_idx" ON "Course_Table" USING GIN ("course_status" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Course_Table_course_level_trgm_idx" ON "Course_Table" USING GIN ("course_level" gin_trgm_ops);
+
+-- CreateIndex
+CREATE INDEX "Course_Table_course_language_trgm_idx" ON "Course_Table" USING GIN ("course_language" gin_trgm_ops);
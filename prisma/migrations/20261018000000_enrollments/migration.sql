@@ -0,0 +1,25 @@
+-- CreateTable
+CREATE TABLE "Enrollment_Table" (
+    "enrollment_id" SERIAL NOT NULL,
+    "student_id" INTEGER NOT NULL,
+    "course_id" INTEGER NOT NULL,
+    "status" TEXT NOT NULL DEFAULT 'active',
+    "progress" INTEGER NOT NULL DEFAULT 0,
+    "enrolled_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "completed_at" TIMESTAMP(3),
+    "updated_at" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "Enrollment_Table_pkey" PRIMARY KEY ("enrollment_id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "Enrollment_Table_student_id_course_id_key" ON "Enrollment_Table"("student_id", "course_id");
+
+-- CreateIndex
+CREATE INDEX "Enrollment_Table_course_id_status_enrollment_id_idx" ON "Enrollment_Table"("course_id", "status", "enrollment_id");
+
+-- AddForeignKey
+ALTER TABLE "Enrollment_Table" ADD CONSTRAINT "Enrollment_Table_student_id_fkey" FOREIGN KEY ("student_id") REFERENCES "Student_Table"("id") ON DELETE CASCADE ON UPDATE CASCADE;
+
+-- AddForeignKey
+ALTER TABLE "Enrollment_Table" ADD CONSTRAINT "Enrollment_Table_course_id_fkey" FOREIGN KEY ("course_id") REFERENCES "Course_Table"("course_id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,53 @@
+-- CreateIndex
+CREATE INDEX "Student_Table_first_name_id_idx" ON "Student_Table"("first_name", "id");
+
+-- CreateIndex
+CREATE INDEX "Student_Table_last_name_id_idx" ON "Student_Table"("last_name", "id");
+
+-- CreateIndex
+CREATE INDEX "Student_Table_created_at_id_idx" ON "Student_Table"("created_at", "id");
+
+-- CreateIndex
+CREATE INDEX "Student_Table_updated_at_id_idx" ON "Student_Table"("updated_at", "id");
+
+-- CreateIndex
+CREATE INDEX "Instructor_Table_first_name_instructor_id_idx" ON "Instructor_Table"("first_name", "instructor_id");
+
+-- CreateIndex
+CREATE INDEX "Instructor_Table_last_name_instructor_id_idx" ON "Instructor_Table"("last_name", "instructor_id");
+
+-- CreateIndex
+CREATE INDEX "Instructor_Table_account_status_instructor_id_idx" ON "Instructor_Table"("account_status", "instructor_id");
+
+-- CreateIndex
+CREATE INDEX "Instructor_Table_created_at_instructor_id_idx" ON "Instructor_Table"("created_at", "instructor_id");
+
+-- CreateIndex
+CREATE INDEX "Instructor_Table_updated_at_instructor_id_idx" ON "Instructor_Table"("updated_at", "instructor_id");
+
+-- CreateIndex
+CREATE INDEX "Admin_Table_first_name_admin_id_idx" ON "Admin_Table"("first_name", "admin_id");
+
+-- CreateIndex
+CREATE INDEX "Admin_Table_last_name_admin_id_idx" ON "Admin_Table"("last_name", "admin_id");
+
+-- CreateIndex
+CREATE INDEX "Admin_Table_account_status_admin_id_idx" ON "Admin_Table"("account_status", "admin_id");
+
+-- CreateIndex
+CREATE INDEX "Admin_Table_created_at_admin_id_idx" ON "Admin_Table"("created_at", "admin_id");
+
+-- CreateIndex
+CREATE INDEX "Admin_Table_updated_at_admin_id_idx" ON "Admin_Table"("updated_at", "admin_id");
+
+-- CreateIndex
+CREATE INDEX "Course_Table_course_title_course_id_idx" ON "Course_Table"("course_title", "course_id");
+
+-- CreateIndex
+CREATE INDEX "Course_Table_course_status_course_id_idx" ON "Course_Table"("course_status", "course_id");
+
+-- CreateIndex
+CREATE INDEX "Course_Table_created_at_course_id_idx" ON "Course_Table"("created_at", "course_id");
+
+-- CreateIndex
+CREATE INDEX "Course_Table_updated_at_course_id_idx" ON "Course_Table"("updated_at", "course_id");
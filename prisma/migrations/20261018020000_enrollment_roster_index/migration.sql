@@ -0,0 +1,2 @@
+-- CreateIndex
+CREATE INDEX "Enrollment_Table_course_id_enrollment_id_idx" ON "Enrollment_Table"("course_id", "enrollment_id");
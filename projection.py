@@ -0,0 +1,98 @@
+import functools
+import typing
+from typing import Optional
+
+import pydantic
+import strawberry
+from strawberry.types.nodes import SelectedField
+
+
+def plain_fields(type_) -> list:
+    """
+    The resolver-less fields of a Strawberry type, in declaration order;
+    those map one-to-one onto database columns
+    """
+    return [field for field in type_.__strawberry_definition__.fields if field.base_resolver is None]
+
+
+def column_fields(info: strawberry.Info, type_) -> typing.Dict[str, str]:
+    """
+    GraphQL name -> column name for the plain fields of a Strawberry type
+    """
+    converter = info.schema.config.name_converter
+    return {converter.get_graphql_name(field): field.python_name for field in plain_fields(type_)}
+
+
+def selected_columns(
+    info: Optional[strawberry.Info],
+    list_field: str,
+    type_,
+    always: typing.Iterable[str] = (),
+) -> Optional[typing.List[str]]:
+    """
+    Database columns needed to answer the selection on ``list_field`` (e.g.
+    ``students``) below the current field, plus ``always`` (primary key,
+    sort column). Resolver fields of ``type_`` (such as ``courses``) select
+    no column.
+
+    Returns None, meaning "every column", when there is no resolver info.
+    """
+    if info is None:
+        return None
+    columns = column_fields(info, type_)
+    wanted = set(always)
+
+    def walk(selections, inside: bool):
+        for selection in selections:
+            if not isinstance(selection, SelectedField):
+                walk(selection.selections, inside)
+            elif inside:
+                if selection.name in columns:
+                    wanted.add(columns[selection.name])
+            elif selection.name == list_field:
+                walk(selection.selections, True)
+
+    for field in info.selected_fields:
+        walk(field.selections, False)
+    return sorted(wanted)
+
+
+@functools.lru_cache(maxsize=None)
+def partial_model(model: typing.Type[pydantic.BaseModel], columns: typing.FrozenSet[str]) -> typing.Type[pydantic.BaseModel]:
+    """
+    Pydantic model with only ``columns`` of a Prisma model, all optional,
+    so projected rows still get their values parsed (e.g. DateTime)
+    """
+    fields = {name: (typing.Optional[model.model_fields[name].annotation], None) for name in columns}
+    return pydantic.create_model(f"{model.__name__}Partial", **fields)
+
+
+async def find_many_columns(
+    actions,
+    columns: Optional[typing.Sequence[str]],
+    where: Optional[dict] = None,
+    skip: Optional[int] = None,
+    take: Optional[int] = None,
+    order=None,
+) -> typing.List[typing.Any]:
+    """
+    ``actions.find_many`` that selects only ``columns`` (all when None).
+
+    The generated client has no ``select`` for find_many, so this builds the
+    same query with an explicit root selection.
+    """
+    if columns is None:
+        return await actions.find_many(where=where, skip=skip, take=take, order=order)
+    if hasattr(actions, "find_many_columns"):
+        # fastpath.FastPathActions selects columns itself
+        return await actions.find_many_columns(columns, where=where, skip=skip, take=take, order=order)
+    # _execute and root_selection are prisma-client-py internals; requirements.txt
+    # pins the exact prisma version this was written against
+    resp = await actions._client._execute(
+        method="find_many",
+        model=actions._model,
+        arguments={"where": where, "skip": skip, "take": take, "order_by": order},
+        root_selection=list(columns),
+    )
+    partial = partial_model(actions._model, frozenset(columns))
+    return [partial.model_validate(row) for row in resp["data"]["result"]]
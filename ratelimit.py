@@ -0,0 +1,170 @@
+import logging
+import math
+import os
+import time
+import typing
+from collections import OrderedDict
+from typing import Optional
+
+import strawberry
+from fastapi import HTTPException
+
+from cache import REDIS_URL
+
+
+# Login throttling: a burst of attempts, then a steady refill rate
+LOGIN_RATE_LIMIT_BACKEND = os.getenv("LOGIN_RATE_LIMIT_BACKEND", "memory")  # "memory" or "redis"
+LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "20"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "10"))
+LOGIN_ACCOUNT_BURST = float(os.getenv("LOGIN_ACCOUNT_BURST", "5"))
+LOGIN_ACCOUNT_PER_MINUTE = float(os.getenv("LOGIN_ACCOUNT_PER_MINUTE", "0.2"))  # one attempt every 5 minutes
+# Buckets kept by the in-memory store; the least recently used are dropped first
+LOGIN_RATE_LIMIT_MAX_KEYS = int(os.getenv("LOGIN_RATE_LIMIT_MAX_KEYS", "100000"))
+
+logger = logging.getLogger(__name__)
+
+
+class BucketLimit(typing.NamedTuple):
+    capacity: float
+    # tokens added per second
+    rate: float
+
+
+class InMemoryBucketStore:
+    """
+    Token buckets for a single process, bounded to ``maxsize`` keys
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, typing.Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, limit: BucketLimit, cost: float = 1) -> typing.Tuple[bool, float]:
+        """
+        Remove ``cost`` tokens if available; returns (allowed, tokens left)
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    async def reset(self, key: str):
+        self._buckets.pop(key, None)
+
+
+# Atomic refill-and-take; KEYS[1] bucket, ARGV capacity, rate, now, cost
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    """
+    Token buckets shared by every worker, for any client with the redis-py
+    asyncio interface (``eval``/``delete``)
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit"):
+        self.client = client
+        self.prefix = prefix
+
+    async def take(self, key: str, limit: BucketLimit, cost: float = 1) -> typing.Tuple[bool, float]:
+        allowed, tokens = await self.client.eval(
+            TOKEN_BUCKET_SCRIPT, 1, f"{self.prefix}:{key}", limit.capacity, limit.rate, time.time(), cost
+        )
+        return bool(int(allowed)), float(tokens)
+
+    async def reset(self, key: str):
+        await self.client.delete(f"{self.prefix}:{key}")
+
+
+def create_bucket_store():
+    if LOGIN_RATE_LIMIT_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("LOGIN_RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        return RedisBucketStore(redis.Redis.from_url(REDIS_URL))
+    return InMemoryBucketStore(maxsize=LOGIN_RATE_LIMIT_MAX_KEYS)
+
+
+class LoginRateLimiter:
+    """
+    Per-IP and per-account token buckets checked before a login touches the
+    database or bcrypt, so a credential-stuffing burst is rejected cheaply.
+
+    The account bucket doubles as a lockout: after ``account.capacity``
+    attempts an account only accepts new attempts at the refill rate. A
+    successful login refills it.
+    """
+
+    def __init__(self, store, ip: BucketLimit, account: BucketLimit):
+        self.store = store
+        self.ip = ip
+        self.account = account
+
+    @staticmethod
+    def account_key(role: str, email: str) -> str:
+        return f"login:account:{role}:{email.strip().lower()}"
+
+    async def check(self, ip: Optional[str], role: str, email: str):
+        checks = [(self.account_key(role, email), self.account)]
+        if ip:
+            # The IP bucket goes first so a blocked client cannot drain account buckets
+            checks.insert(0, (f"login:ip:{ip}", self.ip))
+        for key, limit in checks:
+            try:
+                allowed, tokens = await self.store.take(key, limit)
+            except Exception:
+                # A store outage must not lock everyone out
+                logger.exception("Rate limit store failed for %s", key)
+                return
+            if not allowed:
+                retry_after = math.ceil((1 - tokens) / limit.rate) if limit.rate > 0 else None
+                detail = "Too many login attempts"
+                if retry_after is not None:
+                    detail += f", try again in {retry_after} seconds"
+                raise HTTPException(status_code=429, detail=detail)
+
+    async def succeeded(self, role: str, email: str):
+        try:
+            await self.store.reset(self.account_key(role, email))
+        except Exception:
+            logger.exception("Rate limit store failed to reset %s", email)
+
+
+login_rate_limiter = LoginRateLimiter(
+    create_bucket_store(),
+    ip=BucketLimit(LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE / 60),
+    account=BucketLimit(LOGIN_ACCOUNT_BURST, LOGIN_ACCOUNT_PER_MINUTE / 60),
+)
+
+
+async def check_login_allowed(info: Optional[strawberry.Info], role: str, email: str):
+    """
+    Raise 429 when the caller's IP or the target account is over its login budget
+    """
+    ip = info.context.get("client_ip") if info is not None else None
+    await login_rate_limiter.check(ip, role, email)
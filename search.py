@@ -0,0 +1,59 @@
+import typing
+
+from projection import partial_model
+
+
+# Table, primary key and searchable columns per model. Every column has a
+# pg_trgm GIN index (see the search_trigram_indexes migration), which serves
+# both the ILIKE filter and the similarity() ranking below.
+SEARCH_TABLES = {
+    "student": ("Student_Table", "id", ("first_name", "last_name", "email")),
+    "instructor": ("Instructor_Table", "instructor_id", ("first_name", "last_name", "email")),
+    "admin": ("Admin_Table", "admin_id", ("first_name", "last_name", "email")),
+    "course": ("Course_Table", "course_id", ("course_title", "course_status", "course_level", "course_language")),
+}
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def ranked_search_query(model: str, select: typing.Optional[typing.Sequence[str]] = None) -> str:
+    """
+    SQL for one page of rows matching $1, best trigram similarity first.
+
+    Parameters: $1 search term, $2 ILIKE pattern, $3 limit, $4 offset.
+    ``select`` limits the returned columns (all when None).
+    """
+    table, pk, columns = SEARCH_TABLES[model]
+    match = " OR ".join(f'"{column}" ILIKE $2' for column in columns)
+    score = ", ".join(f'similarity(COALESCE("{column}", \'\'), $1)' for column in columns)
+    selected = ", ".join(f'"{column}"' for column in select) if select else "*"
+    return (
+        f'SELECT {selected} FROM "{table}" WHERE {match} '
+        f'ORDER BY GREATEST({score}) DESC, "{pk}" ASC '
+        f"LIMIT $3 OFFSET $4"
+    )
+
+
+async def ranked_find_many(
+    actions,
+    model: str,
+    term: str,
+    skip: int,
+    take: int,
+    columns: typing.Optional[typing.Sequence[str]] = None,
+) -> typing.List:
+    """
+    Fetch matching rows for ``term`` ordered by relevance, with only
+    ``columns`` when given.
+
+    Returns up to ``take`` + 1 rows so callers can tell whether another page exists.
+    """
+    args = (term, f"%{escape_like(term)}%", take + 1, skip)
+    if columns is None:
+        return await actions.query_raw(ranked_search_query(model), *args)
+    # The model-level query_raw would reject rows with missing columns
+    rows = await actions._client.query_raw(ranked_search_query(model, columns), *args)
+    partial = partial_model(actions._model, frozenset(columns))
+    return [partial.model_validate(row) for row in rows]
@@ -0,0 +1,250 @@
+"""
+Production server: preloads the app, then forks one uvicorn worker per core
+sharing a single listening socket.
+
+    python serve.py --workers 8 --port 8000
+
+Each worker runs the app lifespan (database connection, pool and schema
+warm-up) before it accepts traffic. Signals to the master process:
+
+- SIGTERM / SIGINT: every worker stops accepting, finishes its in-flight
+  requests (up to --graceful-timeout seconds) and shuts down
+- SIGHUP: rolling restart, one worker at a time; each replacement must
+  report ready before the worker it replaces is drained. Workers fork from
+  the preloaded app, so code changes need a full restart.
+
+Workers that die are replaced. Without os.fork (Windows) a single worker
+runs in-process. With more than one worker, set INVALIDATION_BUS=postgres so
+a write in one worker clears the caches of the others.
+"""
+import argparse
+import logging
+import os
+import select
+import signal
+import sys
+import time
+import typing
+
+import uvicorn
+
+from health import health
+from invalidation import LocalTransport, invalidation_bus
+from main import app
+
+
+SERVE_HOST = os.getenv("SERVE_HOST", "0.0.0.0")
+SERVE_PORT = int(os.getenv("SERVE_PORT", "8000"))
+# Worker processes; each holds its own database pool (DB_CONNECTION_LIMIT)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+# Seconds a stopping worker waits for in-flight requests
+SERVE_GRACEFUL_TIMEOUT = float(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))
+# Seconds a new worker may take to start before it is considered failed
+SERVE_WORKER_START_TIMEOUT = float(os.getenv("SERVE_WORKER_START_TIMEOUT", "60"))
+
+logger = logging.getLogger("serve")
+
+
+class WorkerServer(uvicorn.Server):
+    """
+    uvicorn server that tells the master once it accepts connections and
+    marks itself draining (readiness fails) as soon as it is told to stop
+    """
+
+    def __init__(self, config: uvicorn.Config, ready_fd: typing.Optional[int] = None):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if self.ready_fd is not None:
+            if self.started:
+                os.write(self.ready_fd, b"1")
+            os.close(self.ready_fd)
+            self.ready_fd = None
+
+    def handle_exit(self, sig, frame):
+        health.draining = True
+        super().handle_exit(sig, frame)
+
+
+class Master:
+    def __init__(self, config: uvicorn.Config, workers: int, graceful_timeout: float, start_timeout: float):
+        self.config = config
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.start_timeout = start_timeout
+        self.socket = config.bind_socket()
+        # pid -> read end of the worker's readiness pipe (None once ready)
+        self.children: typing.Dict[int, typing.Optional[int]] = {}
+        self.retiring: typing.Set[int] = set()
+        self.stopping = False
+        self.reload_requested = False
+
+    def spawn(self) -> int:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for other_fd in self.children.values():
+                if other_fd is not None:
+                    os.close(other_fd)
+            # uvicorn handles SIGTERM/SIGINT itself; reloads are the master's job
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            signal.set_wakeup_fd(-1)
+            code = 0
+            try:
+                WorkerServer(self.config, write_fd).run(sockets=[self.socket])
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        os.close(write_fd)
+        self.children[pid] = read_fd
+        logger.info("Started worker %d", pid)
+        return pid
+
+    def wait_ready(self, pid: int, timeout: float) -> bool:
+        read_fd = self.children.get(pid)
+        if read_fd is None:
+            return pid in self.children
+        readable, _, _ = select.select([read_fd], [], [], timeout)
+        return bool(readable) and self._read_ready(pid)
+
+    def _read_ready(self, pid: int) -> bool:
+        read_fd = self.children[pid]
+        ready = os.read(read_fd, 1) == b"1"
+        os.close(read_fd)
+        self.children[pid] = None
+        if ready:
+            logger.info("Worker %d ready", pid)
+        return ready
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.retiring.discard(pid)
+            read_fd = self.children.pop(pid, False)
+            if read_fd is False:
+                continue
+            if read_fd is not None:
+                os.close(read_fd)
+            if not self.stopping:
+                logger.warning("Worker %d exited (status %d), replacing it", pid, status)
+                # Don't spin when workers cannot start (e.g. the database is down)
+                time.sleep(1)
+                self.spawn()
+
+    def rolling_restart(self):
+        logger.info("Reloading %d workers", len(self.children))
+        for old in list(self.children):
+            if self.stopping:
+                return
+            new = self.spawn()
+            if not self.wait_ready(new, self.start_timeout):
+                logger.error("Worker %d did not become ready, keeping the current workers", new)
+                self._terminate(new)
+                return
+            self._terminate(old)
+
+    def _terminate(self, pid: int):
+        read_fd = self.children.pop(pid, None)
+        if read_fd is not None:
+            os.close(read_fd)
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            self.retiring.discard(pid)
+
+    def stop(self):
+        for pid in list(self.children):
+            self._terminate(pid)
+        deadline = time.monotonic() + self.graceful_timeout + 10
+        while self.retiring and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.retiring):
+            logger.error("Worker %d did not stop in time, killing it", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.socket.close()
+
+    def run(self):
+        def request_stop(sig, frame):
+            self.stopping = True
+
+        def request_reload(sig, frame):
+            self.reload_requested = True
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGHUP, request_reload)
+        # Signals wake the select below instead of waiting out its timeout
+        wakeup_read, wakeup_write = os.pipe()
+        os.set_blocking(wakeup_read, False)
+        os.set_blocking(wakeup_write, False)
+        signal.set_wakeup_fd(wakeup_write)
+
+        for _ in range(self.workers):
+            self.spawn()
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                self.rolling_restart()
+            self.reap()
+            starting = {read_fd: pid for pid, read_fd in self.children.items() if read_fd is not None}
+            readable, _, _ = select.select([wakeup_read, *starting], [], [], 1.0)
+            if wakeup_read in readable:
+                os.read(wakeup_read, 512)
+            for read_fd in readable:
+                if read_fd in starting and not self._read_ready(starting[read_fd]):
+                    logger.warning("Worker %d exited before it was ready", starting[read_fd])
+        logger.info("Stopping %d workers", len(self.children))
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    parser.add_argument("--graceful-timeout", type=float, default=SERVE_GRACEFUL_TIMEOUT)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s:     [%(process)d] %(name)s: %(message)s")
+    if not hasattr(os, "fork"):
+        logger.warning("os.fork is unavailable, running a single worker")
+        WorkerServer(config).run()
+        return
+    workers = max(args.workers, 1)
+    if workers > 1 and isinstance(invalidation_bus.transport, LocalTransport):
+        logger.warning(
+            "INVALIDATION_BUS=local only clears the caches of the worker that wrote; with %d workers "
+            "the others serve stale counts, course pages and catalog rows until they expire. "
+            "Set INVALIDATION_BUS=postgres.",
+            workers,
+        )
+    Master(config, workers, args.graceful_timeout, SERVE_WORKER_START_TIMEOUT).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
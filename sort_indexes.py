@@ -0,0 +1,76 @@
+import logging
+import os
+import typing
+
+from pagination import SORT_FIELDS
+from search import SEARCH_TABLES
+
+
+# Look for a btree index behind every sortable column when the app starts
+DB_CHECK_SORT_INDEXES = os.getenv("DB_CHECK_SORT_INDEXES", "true").lower() in {"1", "true", "yes"}
+
+logger = logging.getLogger(__name__)
+
+# Leading two key columns of every btree index on the given tables
+BTREE_INDEXES_QUERY = """
+SELECT t.relname AS table_name,
+       ix.relname AS index_name,
+       i.indisunique AS is_unique,
+       i.indnkeyatts AS key_columns,
+       first_col.attname AS first_column,
+       second_col.attname AS second_column
+FROM pg_index i
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_class ix ON ix.oid = i.indexrelid
+JOIN pg_am am ON am.oid = ix.relam
+JOIN pg_attribute first_col ON first_col.attrelid = t.oid AND first_col.attnum = i.indkey[0]
+LEFT JOIN pg_attribute second_col ON second_col.attrelid = t.oid AND second_col.attnum = i.indkey[1]
+WHERE am.amname = 'btree'
+  AND t.relnamespace = to_regnamespace(current_schema())
+  AND t.relname = ANY($1::text[])
+"""
+
+
+def serves_sort(index: dict, field: str, pk: str) -> bool:
+    """
+    Whether ``index`` can return rows in ``ORDER BY field, pk`` order: a
+    (field, pk) index, or a unique index on ``field`` alone (no ties)
+    """
+    if index["first_column"] != field:
+        return False
+    if index["key_columns"] >= 2 and index["second_column"] == pk:
+        return True
+    return bool(index["is_unique"]) and index["key_columns"] == 1
+
+
+async def missing_sort_indexes(client) -> typing.List[typing.Tuple[str, str]]:
+    """
+    (model, field) pairs in SORT_FIELDS with no index serving their sort order
+    """
+    tables = {model: SEARCH_TABLES[model][:2] for model in SORT_FIELDS}
+    indexes = await client.query_raw(BTREE_INDEXES_QUERY, [table for table, _ in tables.values()])
+    missing = []
+    for model, fields in SORT_FIELDS.items():
+        table, pk = tables[model]
+        on_table = [index for index in indexes if index["table_name"] == table]
+        for field in sorted(fields):
+            if field != pk and not any(serves_sort(index, field, pk) for index in on_table):
+                missing.append((model, field))
+    return missing
+
+
+async def check_sort_indexes(client):
+    """
+    Log a warning for each sortable column that would need a full sort
+    """
+    try:
+        missing = await missing_sort_indexes(client)
+    except Exception:
+        logger.exception("Could not check the sort indexes")
+        return
+    for model, field in missing:
+        table, pk, _ = SEARCH_TABLES[model]
+        logger.warning(
+            'No index serves sorting %s by %s; every sorted page scans the table. Expected: CREATE INDEX ON "%s" ("%s", "%s")',
+            model, field, table, field, pk,
+        )
@@ -0,0 +1,57 @@
+import asyncio
+
+from prisma.errors import DataError, UniqueViolationError
+
+import bulk_import
+from bulk_import import bulk_register
+from StudentSchema import StudentInput, validate_email, validate_password
+
+
+class Students:
+    """
+    create_many fails for the whole batch when any row is bad, like Postgres
+    """
+
+    def __init__(self, taken=(), too_long=()):
+        self.taken = set(taken)
+        self.too_long = set(too_long)
+        self.created = []
+
+    async def find_many(self, where):
+        return []
+
+    def check(self, data):
+        if data["email"] in self.taken:
+            raise UniqueViolationError({"user_facing_error": {"message": "Unique constraint failed"}})
+        if data["email"] in self.too_long:
+            raise DataError({"user_facing_error": {"message": "The provided value for the column is too long"}})
+
+    async def create_many(self, data):
+        for item in data:
+            self.check(item)
+        self.created.extend(data)
+        return len(data)
+
+    async def create(self, data):
+        self.check(data)
+        self.created.append(data)
+        return data
+
+
+class Hasher:
+    async def hash_many(self, passwords):
+        return ["hash"] * len(passwords)
+
+
+def test_rejected_rows_are_reported_and_the_rest_inserted(monkeypatch):
+    monkeypatch.setattr(bulk_import, "bulk_password_hasher", Hasher())
+    actions = Students(taken={"b@example.com"}, too_long={"c@example.com"})
+    inputs = [
+        (row, StudentInput(first_name="A", last_name="B", email=email, password="Secret@123"))
+        for row, email in enumerate(["a@example.com", "b@example.com", "c@example.com", "d@example.com"], start=1)
+    ]
+    result = asyncio.run(bulk_register(actions, inputs, validate_email, validate_password))
+    assert result.created == 2
+    assert [item["email"] for item in actions.created] == ["a@example.com", "d@example.com"]
+    assert [(error.row, error.email) for error in result.errors] == [(2, "b@example.com"), (3, "c@example.com")]
+    assert result.errors[0].message == "Email b@example.com is already registered"
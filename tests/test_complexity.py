@@ -0,0 +1,31 @@
+from graphql import parse
+
+from complexity import operation_cost
+from pagination import DEFAULT_PER_PAGE, MAX_PER_PAGE
+
+
+def cost(query: str, variables=None) -> int:
+    return operation_cost(parse(query), None, variables)
+
+
+def test_page_size_literal_and_variable():
+    literal = cost("{ listStudents(perPage: 50) { students { id } } }")
+    assert literal == cost("query($n: Int!) { listStudents(perPage: $n) { students { id } } }", {"n": 50})
+    assert literal > cost("{ listStudents { students { id } } }")
+
+
+def test_variable_default_is_charged():
+    query = "query($n: Int = 100000) { listStudents(perPage: $n) { students { id } } }"
+    assert cost(query) == cost("{ listStudents(perPage: %d) { students { id } } }" % MAX_PER_PAGE)
+    assert cost(query, {"n": 5}) == cost("{ listStudents(perPage: 5) { students { id } } }")
+
+
+def test_unresolved_size_is_charged_as_a_full_page():
+    query = "query($n: Int) { listStudents(first: $n) { students { id } } }"
+    assert cost(query) == cost("{ listStudents(first: %d) { students { id } } }" % MAX_PER_PAGE)
+
+
+def test_missing_size_uses_the_default_page():
+    assert cost("{ listStudents { students { id } } }") == cost(
+        "{ listStudents(perPage: %d) { students { id } } }" % DEFAULT_PER_PAGE
+    )
@@ -0,0 +1,70 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+from prisma.models import Course
+
+import InstructorSchema
+from cache import course_list_cache
+from main import schema
+from pagination import PageInfo
+
+
+QUERY = '{ listCourses(perPage: 2) { courses { courseId courseTitle publishedAt createdAt updatedAt } } }'
+
+
+def test_cached_page_matches_uncached_page(monkeypatch):
+    now = datetime.datetime(2026, 10, 18, 3, 4, 33, 536704, tzinfo=datetime.timezone.utc)
+    rows = [
+        Course(course_id=1, course_title="Algebra", course_status="published", published_at=now, created_at=now, updated_at=now),
+        Course(course_id=2, course_title="Biology", course_status="draft", published_at=None, created_at=now, updated_at=now),
+    ]
+    calls = []
+
+    async def paginate(*args, **kwargs):
+        calls.append(args)
+        return rows, len(rows), len(rows), PageInfo(has_next_page=False, end_cursor=None)
+
+    monkeypatch.setattr(InstructorSchema, "paginate", paginate)
+    monkeypatch.setattr(InstructorSchema.course_catalog, "snapshot", None)
+
+    async def run():
+        await course_list_cache.clear()
+        uncached = await schema.execute(QUERY)
+        cached = await schema.execute(QUERY)
+        await course_list_cache.clear()
+        return uncached, cached
+
+    uncached, cached = asyncio.run(run())
+    assert uncached.errors is None and cached.errors is None
+    assert len(calls) == 1
+    assert cached.data == uncached.data
+    assert uncached.data["listCourses"]["courses"][0]["createdAt"] == str(now)
+
+
+def test_update_course_tags_only_changed_columns(monkeypatch):
+    now = datetime.datetime(2026, 10, 18, tzinfo=datetime.timezone.utc)
+    stored = Course(course_id=7, course_title="Algebra", course_status="draft", created_at=now, updated_at=now)
+    published = []
+
+    class Courses:
+        async def find_unique(self, where):
+            return stored
+
+        async def update(self, where, data):
+            return stored.model_copy(update=data)
+
+    async def publish(entity, keys=(), tags=()):
+        published.append(list(tags))
+
+    monkeypatch.setattr(InstructorSchema, "db", SimpleNamespace(course=Courses()))
+    monkeypatch.setattr(InstructorSchema.course_catalog, "snapshot", None)
+    monkeypatch.setattr(InstructorSchema.invalidation_bus, "publish", publish)
+
+    mutation = 'mutation { updateCourse(courseId: 7, input: {courseTitle: "%s", courseDescription: "x"}) { courseId } }'
+    for title in ("Algebra", "Geometry"):
+        result = asyncio.run(schema.execute(mutation % title))
+        assert result.errors is None
+    unchanged, renamed = published
+    assert "search" not in unchanged and "sort:course_title" not in unchanged
+    assert "search" in renamed and "sort:course_title" in renamed
@@ -0,0 +1,36 @@
+import asyncio
+
+import last_login
+from last_login import LastLoginWriter
+
+
+class SlowDatabase:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.started = asyncio.Event()
+        self.written = []
+
+    async def execute_raw(self, query, pks, timestamps):
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        self.written.extend(pks)
+        return len(pks)
+
+
+def test_stop_during_a_slow_flush_keeps_the_batch(monkeypatch):
+    async def run():
+        database = SlowDatabase(delay=0.2)
+        monkeypatch.setattr(last_login, "db", database)
+        writer = LastLoginWriter(flush_interval=60, batch_size=2)
+        writer.start()
+        writer.record("student", 1)
+        writer.record("student", 2)
+        await asyncio.wait_for(database.started.wait(), timeout=1)
+        # Recorded while the first batch is being written
+        writer.record("student", 3)
+        await writer.stop()
+        return database.written, writer.pending_count()
+
+    written, pending = asyncio.run(run())
+    assert sorted(written) == [1, 2, 3]
+    assert pending == 0
@@ -0,0 +1,23 @@
+from database import create_data, patch_data
+from InstructorSchema import CourseInput, InstructorInput
+from StudentSchema import STUDENT_CLEARABLE_FIELDS, StudentInput
+
+
+def test_omitted_fields_are_left_out_and_null_clears_clearable_fields():
+    input = StudentInput(first_name="Ada", last_name="Lovelace", email="ada@example.com", password="secret-1!", bio=None)
+    assert patch_data(input, exclude=("password",), clearable=STUDENT_CLEARABLE_FIELDS) == {
+        "first_name": "Ada",
+        "last_name": "Lovelace",
+        "email": "ada@example.com",
+        "bio": None,
+    }
+
+
+def test_null_keeps_the_stored_value_by_default():
+    input = InstructorInput(first_name="Ada", last_name="Lovelace", email="ada@example.com", bio=None, email_verified=None)
+    assert patch_data(input) == {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"}
+
+
+def test_create_data_drops_nulls():
+    input = CourseInput(course_title="Algebra", course_level=None, total_modules=0)
+    assert create_data(input) == {"course_title": "Algebra", "total_modules": 0}